@@ -164,6 +164,13 @@ REST_FRAMEWORK = {
     }
 }
 
+# Classroom utilization analytics
+CLASSROOM_WEEKLY_OPENING_HOURS = float(os.getenv("CLASSROOM_WEEKLY_OPENING_HOURS", "60"))
+CLASSROOM_UTILIZATION_CACHE_TIMEOUT = int(os.getenv("CLASSROOM_UTILIZATION_CACHE_TIMEOUT", str(60 * 60 * 24)))
+
+# Maximum number of responses kept by each worker in the timetable cache
+TIMETABLE_CACHE_MAX_ENTRIES = int(os.getenv("TIMETABLE_CACHE_MAX_ENTRIES", "1024"))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Classroom Service',
     'VERSION': '1.0.0',
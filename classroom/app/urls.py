@@ -13,7 +13,13 @@ urlpatterns = [
     path('classroom/<int:pk>/', views.ClassroomUpdateView.as_view()),
     path('classroom/<int:pk>/book/', views.ScheduleCreateView.as_view()),
     path('classrooms/', views.ClassroomListView.as_view()),
+    path('classrooms/available/', views.ClassroomAvailabilityListView.as_view()),
+    path('classrooms/utilization/', views.ClassroomUtilizationView.as_view()),
+    path('classrooms/allocate/', views.ClassroomAllocationView.as_view()),
+    path('classrooms/import/', views.ClassroomImportView.as_view()),
     path('classrooms/schedules/', views.ClassroomScheduleListView.as_view()),
+    path('classrooms/schedules/calendar/', views.ScheduleCalendarView.as_view()),
+    path('classrooms/schedules/bulk/', views.ScheduleBulkCreateView.as_view()),
 
     path('sentry-debug/', trigger_error),
 
@@ -0,0 +1,90 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from classroom.caching import current_versions, utilization_key
+from classroom.models import Schedule
+
+WEEK = timedelta(weeks=1)
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def utilization_cache_key(faculty_id, version, week):
+    return f'classroom-utilization:{faculty_id}:{version}:{week.isoformat()}'
+
+
+def compute_weekly_utilization(faculty_id, start, end):
+    """
+    Groups, in the database, the booked time of the faculty classrooms by classroom, week
+    and schedule type, for the schedules starting in the weeks between the start and end dates.
+    Returns the rows of each week.
+    """
+    opening_hours = settings.CLASSROOM_WEEKLY_OPENING_HOURS
+    duration = ExpressionWrapper(F('end') - F('start'), output_field=DurationField())
+    aggregates = Schedule.objects \
+        .filter(classroom__faculty_id=faculty_id,
+                start__gte=timezone.make_aware(datetime.combine(start, time.min)),
+                start__lt=timezone.make_aware(datetime.combine(end, time.min))) \
+        .annotate(week=TruncWeek('start')) \
+        .values('classroom_id', 'week', 'type') \
+        .annotate(booked=Sum(duration)) \
+        .order_by()
+
+    booked_hours = defaultdict(lambda: {'CL': 0.0, 'EX': 0.0})
+    for aggregate in aggregates:
+        key = (aggregate['week'].date(), aggregate['classroom_id'])
+        booked_hours[key][aggregate['type']] += aggregate['booked'].total_seconds() / 3600
+
+    weeks = defaultdict(list)
+    for (week, classroom_id), hours in sorted(booked_hours.items()):
+        weeks[week].append({
+            'classroom': classroom_id,
+            'week': week,
+            'class_hours': round(hours['CL'], 2),
+            'exam_hours': round(hours['EX'], 2),
+            'class_occupancy': round(hours['CL'] / opening_hours, 4),
+            'exam_occupancy': round(hours['EX'] / opening_hours, 4),
+            'occupancy': round((hours['CL'] + hours['EX']) / opening_hours, 4),
+        })
+    return weeks
+
+
+def weekly_utilization(faculty_id, start, end):
+    """
+    Occupancy of the faculty classrooms in each week between the start and end dates,
+    with the weeks aligned on Mondays.
+
+    Weeks that are already over are cached, so only the current and future weeks and the
+    past weeks missing from the cache are aggregated in the database. The cached weeks are
+    keyed by the utilization version of the faculty, which is only bumped by bookings made
+    in past weeks and by changes of its classrooms.
+    """
+    weeks = []
+    week = week_start(start)
+    while week < end:
+        weeks.append(week)
+        week += WEEK
+
+    current_week = week_start(timezone.localdate())
+    version, = current_versions([utilization_key(faculty_id)])
+    keys = {week: utilization_cache_key(faculty_id, version, week) for week in weeks if week < current_week}
+    cached = cache.get_many(keys.values())
+    buckets = {week: cached[key] for week, key in keys.items() if key in cached}
+
+    missing = [week for week in weeks if week not in buckets]
+    if missing:
+        computed = compute_weekly_utilization(faculty_id, missing[0], missing[-1] + WEEK)
+        for week in missing:
+            buckets[week] = computed.get(week, [])
+        cache.set_many({keys[week]: buckets[week] for week in missing if week in keys},
+                       settings.CLASSROOM_UTILIZATION_CACHE_TIMEOUT)
+
+    return [row for week in weeks for row in buckets[week]]
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from prometheus_client import Counter
+from rest_framework.response import Response
+
+from classroom.models import CacheVersion
+
+CLASSROOMS_KEY = 'classrooms'
+
+cache_hits = Counter('classroom_timetable_cache_hits_total', 'Timetable cache hits', ['view'])
+cache_misses = Counter('classroom_timetable_cache_misses_total', 'Timetable cache misses', ['view'])
+cache_evictions = Counter('classroom_timetable_cache_evictions_total', 'Timetable cache evictions')
+
+
+def faculty_key(faculty_id):
+    return f'faculty:{faculty_id}'
+
+
+def course_edition_key(course_edition_id):
+    return f'course_edition:{course_edition_id}'
+
+
+def utilization_key(faculty_id):
+    return f'utilization:{faculty_id}'
+
+
+class LRUCache:
+    """Thread safe in-process cache that evicts the least recently used entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                cache_evictions.inc()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+timetable_cache = LRUCache(settings.TIMETABLE_CACHE_MAX_ENTRIES)
+
+
+def current_versions(keys):
+    versions = dict(CacheVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+def bump_versions(keys):
+    """
+    Invalidates the cached responses of the given keys. Should be called in the
+    transaction of the write, so the new version is only seen along with the new data.
+    """
+    for key in set(keys):
+        if not CacheVersion.objects.filter(key=key).update(version=F('version') + 1):
+            _, created = CacheVersion.objects.get_or_create(key=key, defaults={'version': 1})
+            if not created:
+                CacheVersion.objects.filter(key=key).update(version=F('version') + 1)
+
+
+def bump_schedule_versions(schedules):
+    """
+    Invalidates the cached responses showing the given (course_edition_id, faculty_id, start)
+    schedules. The utilization of a faculty is only cached for the weeks that are over, so it
+    is invalidated only by schedules starting before the current week.
+    """
+    today = timezone.localdate()
+    current_week = today - timedelta(days=today.weekday())
+    keys = []
+    for course_edition_id, faculty_id, start in schedules:
+        keys += [course_edition_key(course_edition_id), faculty_key(faculty_id)]
+        if timezone.localdate(start) < current_week:
+            keys.append(utilization_key(faculty_id))
+    bump_versions(keys)
+
+
+def cached_response(request, view_name, keys, build):
+    """
+    Returns the response data cached for the request query parameters and the current
+    versions of the keys, or builds and caches it. The versions are kept in the database,
+    so writes handled by any worker invalidate the entries of every worker.
+    """
+    params = tuple(sorted((name, tuple(values)) for name, values in request.query_params.lists()))
+    cache_key = (view_name, request.get_host(), params, tuple(keys), current_versions(keys))
+
+    data = timetable_cache.get(cache_key)
+    if data is not None:
+        cache_hits.labels(view=view_name).inc()
+        return Response(data)
+
+    cache_misses.labels(view=view_name).inc()
+    response = build()
+    if response.status_code == 200:
+        timetable_cache.set(cache_key, response.data)
+    return response
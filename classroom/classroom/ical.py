@@ -0,0 +1,67 @@
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+
+from classroom.models import Schedule
+
+ITERATOR_CHUNK_SIZE = 2000
+EVENTS_PER_CHUNK = 100
+
+
+def escape_text(value):
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def format_datetime(value):
+    return timezone.localtime(value, dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    """Splits a content line in lines of at most 75 octets, as required by RFC 5545."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        # Never split inside a multi-byte character
+        while limit < len(encoded) and (encoded[limit] & 0xC0) == 0x80:
+            limit -= 1
+        parts.append(encoded[:limit].decode())
+        encoded = encoded[limit:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def schedule_event(schedule, stamp):
+    types = dict(Schedule.SCHEDULE_TYPE_CHOICES)
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:schedule-{schedule['id']}@classroom",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{format_datetime(schedule['start'])}",
+        f"DTEND:{format_datetime(schedule['end'])}",
+        f"SUMMARY:{escape_text(types.get(schedule['type'], schedule['type']))} "
+        f"{escape_text(schedule['course_edition_id'])}",
+        f"LOCATION:Classroom {schedule['classroom_id']}",
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+def stream_calendar(schedules):
+    """
+    Yields an iCalendar document with one VEVENT per schedule, reading the schedules
+    in chunks so the whole timetable is never held in memory.
+    """
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//COSN//Classroom Service//EN\r\nCALSCALE:GREGORIAN\r\n'
+    values = schedules.values('id', 'classroom_id', 'course_edition_id', 'start', 'end', 'type')
+    # Every event of the document is stamped with the time it was generated
+    stamp = format_datetime(timezone.now())
+    events = []
+    for schedule in values.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        events.append(schedule_event(schedule, stamp))
+        if len(events) == EVENTS_PER_CHUNK:
+            yield ''.join(events)
+            events = []
+    events.append('END:VCALENDAR\r\n')
+    yield ''.join(events)
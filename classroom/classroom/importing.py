@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from classroom.caching import CLASSROOMS_KEY, bump_versions, faculty_key
+from classroom.models import Classroom
+from classroom.serializers import ClassroomImportSerializer
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+COLUMNS = ('name', 'is_available', 'faculty_id', 'seats')
+READ_SIZE = 64 * 1024
+
+
+def read_lines(stream):
+    """
+    Yields the lines of a binary stream, decoded as UTF-8. Without a size, readline of the
+    request stream loads the whole remaining body, the lines are read by parts instead.
+    """
+    parts = []
+    for part in iter(lambda: stream.readline(READ_SIZE), b''):
+        parts.append(part)
+        if part.endswith(b'\n'):
+            yield b''.join(parts).decode('utf-8')
+            parts = []
+    if parts:
+        yield b''.join(parts).decode('utf-8')
+
+
+def parse_csv(lines):
+    """Yields (line number, row, error) for each row of a CSV document with a header."""
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            # Empty cells are left out so that the field defaults apply
+            yield reader.line_num, {key: value for key, value in row.items() if key and value}, None
+    except csv.Error as error:
+        yield reader.line_num, None, str(error)
+
+
+def parse_ndjson(lines):
+    """Yields (line number, row, error) for each non blank line of a NDJSON document."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, None, f'Invalid JSON: {error}'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Each line must be a JSON object'
+            continue
+        yield number, row, None
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ndjson': parse_ndjson,
+}
+
+
+def copy_classrooms(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row['name'], 't' if row['is_available'] else 'f', row['faculty_id'], row['seats']])
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(Classroom._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column) for column in COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def insert_classrooms(rows):
+    if connection.vendor == 'postgresql':
+        copy_classrooms(rows)
+    else:
+        Classroom.objects.bulk_create([Classroom(**row) for row in rows])
+
+
+def import_classrooms(records):
+    """
+    Validates the (line number, row, error) records one at a time and inserts the valid
+    classrooms in batches, with COPY on PostgreSQL and bulk_create elsewhere.
+
+    The import is atomic: when a record is invalid nothing is inserted, the remaining
+    records are still validated and the errors found are returned.
+    Returns the number of imported classrooms and the list of errors.
+    """
+    imported = 0
+    errors = []
+    batch = []
+    faculty_ids = set()
+
+    # A single serializer validates every row, building its fields once instead of once per row
+    validator = ClassroomImportSerializer()
+
+    with transaction.atomic():
+        for line, row, error in records:
+            if error is None:
+                try:
+                    row = validator.run_validation(row)
+                except ValidationError as validation_error:
+                    error = validation_error.detail
+
+            if error is not None:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line, 'details': error})
+                continue
+            if errors:
+                continue
+
+            batch.append(row)
+            faculty_ids.add(row['faculty_id'])
+            if len(batch) == BATCH_SIZE:
+                insert_classrooms(batch)
+                imported += len(batch)
+                batch = []
+
+        if errors:
+            transaction.set_rollback(True)
+            return 0, errors
+
+        if batch:
+            insert_classrooms(batch)
+            imported += len(batch)
+        bump_versions([faculty_key(faculty_id) for faculty_id in faculty_ids] + [CLASSROOMS_KEY])
+
+    return imported, errors
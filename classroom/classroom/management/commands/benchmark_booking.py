@@ -0,0 +1,72 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from classroom.models import Classroom, Schedule
+from classroom.scheduling import is_occupied
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the booking overlap check against classrooms holding many schedules. ' \
+           'Everything is done inside a transaction that is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedules', type=int, default=10000,
+                            help='Number of schedules per classroom')
+        parser.add_argument('--classrooms', type=int, default=3)
+        parser.add_argument('--checks', type=int, default=1000,
+                            help='Number of overlap checks to time')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            classrooms = self.populate(options['classrooms'], options['schedules'])
+            intervals = self.random_intervals(classrooms, options['schedules'], options['checks'])
+
+            self.report('legacy (3 counts)', self.time_checks(intervals, self.legacy_is_occupied))
+            self.report('predecessor', self.time_checks(intervals, is_occupied))
+
+            transaction.set_rollback(True)
+
+    def populate(self, number_classrooms, number_schedules):
+        classrooms = Classroom.objects.bulk_create([
+            Classroom(name=f'BENCH{i}', faculty_id=0, seats=30) for i in range(number_classrooms)
+        ])
+        epoch = datetime(2022, 1, 1, 8, tzinfo=timezone.utc)
+        for classroom in classrooms:
+            # One hour bookings separated by a free half hour
+            Schedule.objects.bulk_create([
+                Schedule(classroom=classroom, course_edition_id='bench', type='CL',
+                         start=epoch + timedelta(minutes=90 * i),
+                         end=epoch + timedelta(minutes=90 * i + 60))
+                for i in range(number_schedules)
+            ], batch_size=1000)
+        return classrooms
+
+    def random_intervals(self, classrooms, number_schedules, number_checks):
+        epoch = datetime(2022, 1, 1, 8, tzinfo=timezone.utc)
+        intervals = []
+        for _ in range(number_checks):
+            start = epoch + timedelta(minutes=random.randrange(90 * number_schedules))
+            intervals.append((random.choice(classrooms), start,
+                              start + timedelta(minutes=random.choice((15, 30, 60, 120)))))
+        return intervals
+
+    @staticmethod
+    def legacy_is_occupied(classroom, start, end):
+        return Schedule.objects.filter(classroom=classroom, start__gte=start, end__lte=start).count() != 0 or \
+            Schedule.objects.filter(classroom=classroom, start__lte=start, end__gte=start).count() != 0 or \
+            Schedule.objects.filter(classroom=classroom, start__lte=end, end__gte=end).count() != 0
+
+    @staticmethod
+    def time_checks(intervals, check):
+        begin = time.perf_counter()
+        occupied = sum(1 for classroom, start, end in intervals if check(classroom, start, end))
+        return time.perf_counter() - begin, occupied, len(intervals)
+
+    def report(self, name, result):
+        elapsed, occupied, total = result
+        self.stdout.write(f'{name}: {total} checks in {elapsed:.3f}s '
+                          f'({elapsed / total * 1000:.3f} ms/check, {occupied} occupied)')
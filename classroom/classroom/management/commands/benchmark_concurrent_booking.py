@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.models import Exists, OuterRef
+from rest_framework.test import APIRequestFactory
+
+from classroom.models import Classroom, Schedule
+from classroom.views import ScheduleCreateView
+
+
+class Command(BaseCommand):
+    help = 'Books overlapping slots of a few classrooms from many threads through ScheduleCreateView ' \
+           'and checks that no classroom was double booked. The benchmark classrooms are deleted at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--classrooms', type=int, default=4)
+        parser.add_argument('--bookings', type=int, default=100,
+                            help='Number of bookings attempted by each thread')
+        parser.add_argument('--slots', type=int, default=50,
+                            help='Number of distinct hours that can be booked in each classroom')
+
+    def handle(self, *args, **options):
+        classrooms = Classroom.objects.bulk_create([
+            Classroom(name=f'BENCH{i}', faculty_id=0, seats=30) for i in range(options['classrooms'])
+        ])
+        # Throttling is disabled, the goal is to measure the booking path itself
+        view = ScheduleCreateView.as_view(throttle_classes=[])
+        results = Counter()
+        lock = threading.Lock()
+
+        def worker():
+            factory = APIRequestFactory()
+            epoch = datetime(2022, 1, 1, 8, tzinfo=timezone.utc)
+            statuses = Counter()
+            try:
+                for _ in range(options['bookings']):
+                    classroom = random.choice(classrooms)
+                    # Half hour offsets make bookings partially overlap each other
+                    start = epoch + timedelta(minutes=30 * random.randrange(2 * options['slots']))
+                    request = factory.post(f'/classroom/{classroom.pk}/book/', {
+                        'course_edition_id': 'bench',
+                        'start': start.isoformat(),
+                        'end': (start + timedelta(hours=1)).isoformat(),
+                        'type': 'CL',
+                    }, format='json', HTTP_HOST='localhost')
+                    try:
+                        statuses[view(request, pk=classroom.pk).status_code] += 1
+                    except OperationalError:
+                        statuses['error'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    results.update(statuses)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        begin = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - begin
+
+        overlapping = Schedule.objects.filter(
+            classroom__in=classrooms,
+        ).filter(Exists(Schedule.objects.filter(
+            classroom=OuterRef('classroom'), id__lt=OuterRef('id'),
+            start__lt=OuterRef('end'), end__gt=OuterRef('start'),
+        ))).count()
+
+        total = sum(results.values())
+        self.stdout.write(f'{total} booking requests in {elapsed:.3f}s ({total / elapsed:.1f} requests/s)')
+        self.stdout.write(f'created: {results[201]}, rejected: {results[400]}, '
+                          f'failed: {total - results[201] - results[400]}')
+        self.stdout.write(f'double bookings: {overlapping}')
+
+        Classroom.objects.filter(pk__in=[classroom.pk for classroom in classrooms]).delete()
@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classroom.importing import PARSERS, import_classrooms
+
+
+class Command(BaseCommand):
+    help = 'Imports classrooms from a CSV (with a name,is_available,faculty_id,seats header) or NDJSON file. ' \
+           'Nothing is imported if any row is invalid.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=PARSERS.keys(),
+                            help='Format of the file, guessed from its extension by default')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in PARSERS:
+            raise CommandError('Unknown format, use --format')
+
+        with open(options['path'], newline='', encoding='utf-8') as file:
+            imported, errors = import_classrooms(PARSERS[file_format](file))
+
+        if errors:
+            for error in errors:
+                self.stderr.write(f"line {error['line']}: {error['details']}")
+            raise CommandError('The file has invalid rows, no classroom was imported')
+        self.stdout.write(f'Imported {imported} classrooms')
@@ -0,0 +1,63 @@
+# Generated by Django 4.1.4 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+MAX_REPORTED_CONFLICTS = 50
+
+
+def check_no_overlaps(apps, schema_editor):
+    """
+    Fails with the list of the conflicting bookings when two schedules of a classroom
+    overlap, as the exclusion constraint could not be added and the booking checks
+    assume that the stored intervals of a classroom are disjoint.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT a.classroom_id, a.id, b.id FROM classroom_schedule a '
+            'JOIN classroom_schedule b ON b.classroom_id = a.classroom_id AND b.id > a.id '
+            'AND a."start" < b."end" AND b."start" < a."end" '
+            'ORDER BY a.classroom_id, a.id, b.id LIMIT %s',
+            [MAX_REPORTED_CONFLICTS + 1],
+        )
+        conflicts = cursor.fetchall()
+    if conflicts:
+        pairs = ', '.join(f'classroom {classroom_id}: schedules {first} and {second}'
+                          for classroom_id, first, second in conflicts[:MAX_REPORTED_CONFLICTS])
+        more = ' and more' if len(conflicts) > MAX_REPORTED_CONFLICTS else ''
+        raise RuntimeError(
+            f'Overlapping schedules must be moved or deleted before migrating: {pairs}{more}')
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # On SQLite (development mode) the interval index and the check done on booking are used instead
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        'ALTER TABLE classroom_schedule ADD CONSTRAINT schedule_classroom_no_overlap '
+        'EXCLUDE USING gist (classroom_id WITH =, tstzrange("start", "end", \'[)\') WITH &&)'
+    )
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE classroom_schedule DROP CONSTRAINT IF EXISTS schedule_classroom_no_overlap'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['classroom', 'start', 'end'], name='schedule_classroom_interval'),
+        ),
+        migrations.RunPython(check_no_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.4 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0002_schedule_interval'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(fields=['faculty_id', 'is_available', 'seats'], name='classroom_faculty_seats'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.4 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0003_classroom_faculty_seats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['course_edition_id', 'start'], name='schedule_course_edition_start'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.4 on 2026-10-18 14:58
+
+from django.db import migrations, models
+import django_prometheus.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0004_schedule_course_edition_start'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            bases=(django_prometheus.models.ExportModelOperationsMixin('cacheversion'), models.Model),
+        ),
+    ]
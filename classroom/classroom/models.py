@@ -9,6 +9,11 @@ class Classroom(ExportModelOperationsMixin('classroom'), models.Model):
     faculty_id = models.PositiveBigIntegerField()
     seats = models.PositiveIntegerField(validators=[MinValueValidator(1)])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['faculty_id', 'is_available', 'seats'], name='classroom_faculty_seats'),
+        ]
+
 
 class Schedule(ExportModelOperationsMixin('schedule'), models.Model):
     classroom = models.ForeignKey(
@@ -21,3 +26,15 @@ class Schedule(ExportModelOperationsMixin('schedule'), models.Model):
         ('EX', 'Exam'),
     )
     type = models.CharField(max_length=2, choices=SCHEDULE_TYPE_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['classroom', 'start', 'end'], name='schedule_classroom_interval'),
+            models.Index(fields=['course_edition_id', 'start'], name='schedule_course_edition_start'),
+        ]
+
+
+class CacheVersion(ExportModelOperationsMixin('cacheversion'), models.Model):
+    key = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
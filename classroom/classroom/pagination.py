@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ClassroomCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the classroom ids, so the cost of a page does not depend
+    on how deep it is.
+    """
+    ordering = 'id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
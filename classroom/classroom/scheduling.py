@@ -0,0 +1,196 @@
+import random
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from classroom.models import Classroom, Schedule
+
+MAX_BOOKING_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 0.02
+# Serialization failure and deadlock detected on PostgreSQL
+RETRYABLE_PGCODES = ('40001', '40P01')
+
+
+def is_occupied(classroom, start, end):
+    """
+    Whether a schedule of the classroom intersects the [start, end) interval.
+
+    The stored intervals of a classroom never overlap, so if any schedule intersects the
+    interval, the one starting last before its end does. That single schedule is read by
+    a backward scan of the (classroom, start, end) index, whatever the classroom history.
+    """
+    previous_end = Schedule.objects.filter(classroom=classroom, start__lt=end).order_by('-start') \
+        .values_list('end', flat=True).first()
+    return previous_end is not None and previous_end > start
+
+
+def lock_classrooms(classroom_ids):
+    """
+    Locks the rows of the given classrooms until the end of the transaction, always in
+    the same order, and returns them. Bookings of a classroom are serialized by this lock,
+    while bookings of other classrooms proceed in parallel. It is taken before anything
+    else is read in the transaction, so the schedules checked afterwards are current.
+    """
+    classrooms = Classroom.objects.filter(pk__in=classroom_ids).order_by('pk')
+    if connection.vendor == 'sqlite':
+        # SQLite ignores FOR UPDATE, writing first takes the database write lock instead, so
+        # the transaction waits for other writers rather than failing when it writes later
+        classrooms.update(id=F('id'))
+    return list(classrooms.select_for_update())
+
+
+def is_retryable(error):
+    pgcode = getattr(error.__cause__, 'pgcode', None)
+    # SQLite has no row locks and reports a concurrent writer as a locked database
+    return pgcode in RETRYABLE_PGCODES or 'database is locked' in str(error)
+
+
+def run_with_retry(function, attempts=MAX_BOOKING_ATTEMPTS):
+    """
+    Runs the function in a transaction, retrying it with a randomized exponential backoff
+    when the transaction is aborted by a serialization failure or a deadlock.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                return function()
+        except OperationalError as error:
+            if attempt == attempts or not is_retryable(error):
+                raise
+            time.sleep(random.uniform(0, RETRY_BACKOFF_SECONDS * 2 ** attempt))
+
+
+def available_classrooms(faculty_id, start, end, seats=1):
+    """
+    Classrooms of the faculty that are not under maintenance, have at least the given
+    number of seats and have no schedule overlapping the [start, end) window, smallest first.
+
+    As in is_occupied, only the schedule of each classroom starting last before the end of
+    the window can overlap it. Its end is read by a backward scan of the schedule interval
+    index, so each classroom appears once and costs one index lookup whatever its history.
+    """
+    previous_end = Schedule.objects.filter(classroom=OuterRef('pk'), start__lt=end).order_by('-start') \
+        .values('end')[:1]
+    return Classroom.objects.filter(faculty_id=faculty_id, is_available=True, seats__gte=seats) \
+        .alias(previous_end=Subquery(previous_end)) \
+        .filter(Q(previous_end__isnull=True) | Q(previous_end__lte=start)) \
+        .order_by('seats', 'id')
+
+
+class OccupiedIntervals:
+    """
+    Sorted and disjoint [start, end) intervals in which a classroom is occupied.
+
+    Overlapping intervals are merged when loaded, so the interval right before the
+    insertion point of an end is the only one that can overlap a new booking.
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if self.ends and start < self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def overlaps(self, start, end):
+        position = bisect_left(self.starts, end)
+        return position > 0 and self.ends[position - 1] > start
+
+    def add(self, start, end):
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+
+
+def occupied_intervals(classroom_ids, start, end):
+    """
+    Loads, with a single query, the occupied intervals of every given classroom
+    that intersect the [start, end) window.
+    """
+    intervals = defaultdict(list)
+    schedules = Schedule.objects.filter(classroom_id__in=classroom_ids, start__lt=end, end__gt=start) \
+        .values_list('classroom_id', 'start', 'end')
+    for classroom_id, schedule_start, schedule_end in schedules:
+        intervals[classroom_id].append((schedule_start, schedule_end))
+    return {classroom_id: OccupiedIntervals(intervals[classroom_id]) for classroom_id in classroom_ids}
+
+
+def find_conflicts(bookings):
+    """
+    Receives a list of (classroom_id, start, end) bookings and returns the set of the
+    indexes that overlap either an existing schedule or a previous booking of the list.
+    """
+    if not bookings:
+        return set()
+
+    window_start = min(start for _, start, _ in bookings)
+    window_end = max(end for _, _, end in bookings)
+    occupied = occupied_intervals({classroom_id for classroom_id, _, _ in bookings}, window_start, window_end)
+
+    conflicts = set()
+    for index, (classroom_id, start, end) in enumerate(bookings):
+        if occupied[classroom_id].overlaps(start, end):
+            conflicts.add(index)
+        else:
+            occupied[classroom_id].add(start, end)
+    return conflicts
+
+
+def allocate_classrooms(classrooms, students):
+    """
+    Picks classrooms whose seats add up to the number of students, using as few
+    classrooms as possible: the largest classrooms are taken until the remaining students
+    fit in a single one, which is then the smallest that fits them.
+    Returns None when all the classrooms together do not have enough seats.
+    """
+    pool = sorted(classrooms, key=lambda classroom: (-classroom.seats, classroom.pk))
+    if sum(classroom.seats for classroom in pool) < students:
+        return None
+
+    negative_seats = [-classroom.seats for classroom in pool]
+    chosen = []
+    remaining = students
+    for position, classroom in enumerate(pool):
+        # Among the classrooms left, the ones fitting the remaining students come before this index
+        fitting = bisect_left(negative_seats, 1 - remaining, lo=position)
+        if fitting > position:
+            chosen.append(pool[fitting - 1])
+            break
+        chosen.append(classroom)
+        remaining -= classroom.seats
+    return chosen
+
+
+def expand_weekly(start, end, until, exceptions=(), limit=None):
+    """
+    Expands a weekly recurrence of the [start, end) booking into its occurrences up to
+    the until date (inclusive), skipping the occurrences that start on an exception date.
+    At most limit occurrences are returned, so a caller rejecting more than a maximum
+    passes the maximum plus one.
+
+    The expansion is done in local time, so occurrences keep their wall clock hours
+    across daylight saving time changes.
+    """
+    exceptions = set(exceptions)
+    local_start = timezone.localtime(start).replace(tzinfo=None)
+    duration = end - start
+
+    occurrences = []
+    occurrence_start = local_start
+    while occurrence_start.date() <= until and (limit is None or len(occurrences) < limit):
+        if occurrence_start.date() not in exceptions:
+            aware_start = timezone.make_aware(occurrence_start)
+            occurrences.append((aware_start, aware_start + duration))
+        if (until - occurrence_start.date()).days < 7:
+            # Stops before stepping past the until date, which may be the last representable one
+            break
+        occurrence_start += timedelta(weeks=1)
+    return occurrences
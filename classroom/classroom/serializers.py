@@ -1,13 +1,62 @@
+from datetime import timedelta
+
 from classroom.models import Classroom, Schedule
+from django.db.backends.base.operations import BaseDatabaseOperations
 from rest_framework import serializers
 
 
+class RecurrenceSerializer(serializers.Serializer):
+    frequency = serializers.ChoiceField(choices=['WEEKLY'])
+    until = serializers.DateField()
+    exceptions = serializers.ListField(child=serializers.DateField(), default=list)
+
+
 class ScheduleSerializer(serializers.ModelSerializer):
+    MAX_RECURRENCE_DAYS = 366
+
+    recurrence = RecurrenceSerializer(required=False, write_only=True)
+
     class Meta:
         model = Schedule
-        fields = '__all__'
+        exclude = ['updated_at']
         read_only = ['id', 'classroom']
 
+    def validate(self, attrs):
+        recurrence = attrs.get('recurrence')
+        if recurrence and (recurrence['until'] - attrs['start'].date()).days > self.MAX_RECURRENCE_DAYS:
+            raise serializers.ValidationError(
+                {'recurrence': f'A recurrence can not last more than {self.MAX_RECURRENCE_DAYS} days'})
+        return attrs
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    classroom = serializers.IntegerField(source='classroom_id')
+
+    class Meta:
+        model = Schedule
+        exclude = ['updated_at']
+        read_only = ['id']
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError('End date must be higher than start date')
+        return attrs
+
+
+class AcceptedBookingSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    schedule = BookingSerializer()
+
+
+class RejectedBookingSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    details = serializers.JSONField()
+
+
+class BulkBookingReportSerializer(serializers.Serializer):
+    accepted = AcceptedBookingSerializer(many=True)
+    rejected = RejectedBookingSerializer(many=True)
+
 
 class ClassroomWithScheduleSerializer(serializers.ModelSerializer):
     schedules = ScheduleSerializer(many=True)
@@ -25,5 +74,86 @@ class ClassroomWithoutScheduleSerializer(serializers.ModelSerializer):
         read_only = ['id', 'name', 'seats']
 
 
+class AvailabilityParametersSerializer(serializers.Serializer):
+    faculty_id = serializers.IntegerField(min_value=0)
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    seats = serializers.IntegerField(min_value=1, default=1)
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError('End date must be higher than start date')
+        return attrs
+
+
+def column_max_value(model, field_name):
+    """Largest value of an integer column, on every supported database."""
+    field = model._meta.get_field(field_name)
+    return BaseDatabaseOperations.integer_field_ranges[field.get_internal_type()][1]
+
+
+class ClassroomImportSerializer(serializers.ModelSerializer):
+    # Values out of the range of the columns are rejected with their row instead of failing the insert
+    class Meta:
+        model = Classroom
+        fields = ['name', 'is_available', 'faculty_id', 'seats']
+        extra_kwargs = {
+            'is_available': {'default': True},
+            'faculty_id': {'min_value': 0, 'max_value': column_max_value(Classroom, 'faculty_id')},
+            'seats': {'max_value': column_max_value(Classroom, 'seats')},
+        }
+
+
+class ImportResultSerializer(serializers.Serializer):
+    imported = serializers.IntegerField()
+
+
+class ImportErrorSerializer(serializers.Serializer):
+    details = serializers.CharField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+class AllocationSerializer(serializers.Serializer):
+    faculty_id = serializers.IntegerField(min_value=0)
+    course_edition_id = serializers.CharField(max_length=24)
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    students = serializers.IntegerField(min_value=1)
+    type = serializers.ChoiceField(choices=Schedule.SCHEDULE_TYPE_CHOICES, default='EX')
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError('End date must be higher than start date')
+        return attrs
+
+
+class AllocationResultSerializer(serializers.Serializer):
+    seats = serializers.IntegerField()
+    schedules = ScheduleSerializer(many=True)
+
+
+class UtilizationParametersSerializer(serializers.Serializer):
+    faculty_id = serializers.IntegerField(min_value=0)
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError('End date must be higher than start date')
+        if attrs['end'] - attrs['start'] > timedelta(days=3 * 366):
+            raise serializers.ValidationError('The period can not be longer than 3 years')
+        return attrs
+
+
+class UtilizationSerializer(serializers.Serializer):
+    classroom = serializers.IntegerField()
+    week = serializers.DateField()
+    class_hours = serializers.FloatField()
+    exam_hours = serializers.FloatField()
+    class_occupancy = serializers.FloatField()
+    exam_occupancy = serializers.FloatField()
+    occupancy = serializers.FloatField()
+
+
 class ErrorSerializer(serializers.Serializer):
     details = serializers.CharField()
@@ -0,0 +1,224 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone as django_timezone
+
+from classroom import analytics
+from classroom.models import Classroom, Schedule
+from classroom.scheduling import OccupiedIntervals, allocate_classrooms, expand_weekly, find_conflicts
+
+
+def at(hour):
+    return datetime(2024, 3, 4, hour, tzinfo=timezone.utc)
+
+
+class ScheduleCalendarTests(TestCase):
+    url = '/classrooms/schedules/calendar/'
+
+    def setUp(self):
+        classroom = Classroom.objects.create(name='A', faculty_id=1, seats=30)
+        self.schedule = Schedule.objects.create(
+            classroom=classroom, course_edition_id='CE1', type='CL', start=at(9), end=at(11))
+
+    def test_edited_schedule_changes_the_etag(self):
+        etag = self.client.get(self.url, {'course_edition_id': 'CE1'})['ETag']
+        self.schedule.start = at(10)
+        self.schedule.save()
+        response = self.client.get(self.url, {'course_edition_id': 'CE1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_feed_is_not_modified(self):
+        etag = self.client.get(self.url, {'course_edition_id': 'CE1'})['ETag']
+        response = self.client.get(self.url, {'course_edition_id': 'CE1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_events_are_stamped_with_the_generation_time(self):
+        response = self.client.get(self.url, {'course_edition_id': 'CE1'})
+        calendar = b''.join(response.streaming_content).decode()
+        self.assertIn('DTSTART:20240304T090000Z', calendar)
+        self.assertNotIn('DTSTAMP:20240304T090000Z', calendar)
+
+
+class OccupiedIntervalsTests(SimpleTestCase):
+    def test_merges_overlapping_and_contained_intervals(self):
+        intervals = OccupiedIntervals([(at(9), at(12)), (at(10), at(11)), (at(11), at(13)), (at(15), at(16))])
+        self.assertEqual(intervals.starts, [at(9), at(15)])
+        self.assertEqual(intervals.ends, [at(13), at(16)])
+
+    def test_adjacent_intervals_do_not_overlap(self):
+        intervals = OccupiedIntervals([(at(9), at(10)), (at(12), at(13))])
+        self.assertFalse(intervals.overlaps(at(10), at(12)))
+        self.assertFalse(intervals.overlaps(at(8), at(9)))
+        self.assertFalse(intervals.overlaps(at(13), at(14)))
+
+    def test_overlapping_and_contained_intervals_overlap(self):
+        intervals = OccupiedIntervals([(at(9), at(12))])
+        self.assertTrue(intervals.overlaps(at(8), at(10)))
+        self.assertTrue(intervals.overlaps(at(10), at(11)))
+        self.assertTrue(intervals.overlaps(at(8), at(13)))
+
+    def test_added_intervals_are_kept_sorted(self):
+        intervals = OccupiedIntervals([(at(9), at(10))])
+        intervals.add(at(14), at(15))
+        intervals.add(at(11), at(12))
+        self.assertEqual(intervals.starts, [at(9), at(11), at(14)])
+        self.assertTrue(intervals.overlaps(at(11), at(13)))
+        self.assertFalse(intervals.overlaps(at(12), at(14)))
+
+
+class FindConflictsTests(TestCase):
+    def setUp(self):
+        self.classroom = Classroom.objects.create(name='A', faculty_id=1, seats=30)
+        self.other = Classroom.objects.create(name='B', faculty_id=1, seats=30)
+        Schedule.objects.create(classroom=self.classroom, course_edition_id='CE1', type='CL', start=at(10), end=at(12))
+
+    def test_adjacent_bookings_do_not_conflict(self):
+        bookings = [(self.classroom.id, at(8), at(10)), (self.classroom.id, at(12), at(13)),
+                    (self.classroom.id, at(13), at(14))]
+        self.assertEqual(find_conflicts(bookings), set())
+
+    def test_contained_and_containing_bookings_conflict(self):
+        bookings = [(self.classroom.id, at(10), at(11)), (self.classroom.id, at(9), at(13))]
+        self.assertEqual(find_conflicts(bookings), {0, 1})
+
+    def test_bookings_of_the_list_conflict_with_previous_ones(self):
+        bookings = [(self.other.id, at(9), at(13)), (self.other.id, at(10), at(11)), (self.classroom.id, at(12), at(14)),
+                    (self.other.id, at(13), at(15))]
+        self.assertEqual(find_conflicts(bookings), {1})
+
+
+class AllocateClassroomsTests(SimpleTestCase):
+    classrooms = [Classroom(pk=pk, seats=seats) for pk, seats in ((1, 30), (2, 100), (3, 60), (4, 70))]
+
+    def allocate(self, students):
+        allocation = allocate_classrooms(self.classrooms, students)
+        return allocation and [classroom.pk for classroom in allocation]
+
+    def test_smallest_single_classroom_that_fits(self):
+        self.assertEqual(self.allocate(50), [3])
+        self.assertEqual(self.allocate(100), [2])
+
+    def test_splits_across_the_largest_classrooms(self):
+        self.assertEqual(self.allocate(130), [2, 1])
+        self.assertEqual(self.allocate(170), [2, 4])
+        self.assertEqual(self.allocate(200), [2, 4, 1])
+
+    def test_every_classroom_when_students_fill_them(self):
+        self.assertEqual(self.allocate(260), [2, 4, 3, 1])
+
+    def test_none_when_the_seats_are_not_enough(self):
+        self.assertIsNone(self.allocate(261))
+
+
+class ExpandWeeklyTests(SimpleTestCase):
+    def test_expands_every_week_up_to_the_until_date(self):
+        occurrences = expand_weekly(at(9), at(11), date(2024, 3, 25))
+        self.assertEqual(occurrences, [(at(9) + timedelta(weeks=week), at(11) + timedelta(weeks=week))
+                                       for week in range(4)])
+
+    def test_skips_the_exceptions(self):
+        occurrences = expand_weekly(at(9), at(11), date(2024, 3, 25), [date(2024, 3, 11), date(2024, 3, 12)])
+        self.assertEqual([start.date() for start, _ in occurrences],
+                         [date(2024, 3, 4), date(2024, 3, 18), date(2024, 3, 25)])
+
+    def test_stops_at_the_limit(self):
+        occurrences = expand_weekly(at(9), at(11), date(9999, 12, 31), limit=3)
+        self.assertEqual(len(occurrences), 3)
+
+    def test_stops_before_the_last_representable_date(self):
+        start = datetime(9999, 12, 20, 9, tzinfo=timezone.utc)
+        occurrences = expand_weekly(start, start + timedelta(hours=1), date(9999, 12, 31))
+        self.assertEqual(len(occurrences), 2)
+
+    def test_keeps_the_wall_clock_hour_across_daylight_saving_time(self):
+        with django_timezone.override('Europe/Lisbon'):
+            # 09:00 WET, the clocks move forward on 2024-03-31
+            start = datetime(2024, 3, 24, 9, tzinfo=timezone.utc)
+            occurrences = expand_weekly(start, start + timedelta(hours=2), date(2024, 4, 7))
+        self.assertEqual([start.astimezone(timezone.utc).hour for start, _ in occurrences], [9, 8, 8])
+        self.assertTrue(all(end - start == timedelta(hours=2) for start, end in occurrences))
+
+
+class RecurringBookingTests(TestCase):
+    def setUp(self):
+        self.classroom = Classroom.objects.create(name='A', faculty_id=1, seats=30)
+
+    def book(self, until):
+        return self.client.post(f'/classroom/{self.classroom.id}/book/', {
+            'course_edition_id': 'CE1', 'type': 'CL', 'start': at(9).isoformat(), 'end': at(11).isoformat(),
+            'recurrence': {'frequency': 'WEEKLY', 'until': until},
+        }, content_type='application/json')
+
+    def test_books_every_occurrence(self):
+        response = self.book('2024-03-25')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Schedule.objects.filter(classroom=self.classroom).count(), 4)
+
+    def test_rejects_a_recurrence_longer_than_a_year(self):
+        response = self.book('9999-12-31')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Schedule.objects.exists())
+
+
+class ClassroomImportTests(TestCase):
+    url = '/classrooms/import/'
+
+    def test_imports_every_row(self):
+        body = 'name,is_available,faculty_id,seats\nA,true,1,30\nB,,2,40\n'
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(Classroom.objects.values_list('name', 'is_available')), [('A', True), ('B', True)])
+
+    def test_rejects_values_out_of_the_range_of_the_columns(self):
+        body = '\n'.join([
+            '{"name": "A", "faculty_id": 1, "seats": 30}',
+            '{"name": "B", "faculty_id": 1, "seats": 99999999999999999999}',
+            '{"name": "C", "faculty_id": 99999999999999999999, "seats": 30}',
+            '{"name": "D", "faculty_id": -1, "seats": 30}',
+        ])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([(error['line'], list(error['details'])) for error in response.json()['errors']],
+                         [(2, ['seats']), (3, ['faculty_id']), (4, ['faculty_id'])])
+        self.assertFalse(Classroom.objects.exists())
+
+
+class WeeklyUtilizationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.classroom = Classroom.objects.create(name='A', faculty_id=1, seats=30)
+        self.current_week = analytics.week_start(django_timezone.localdate())
+        self.first_week = self.current_week - timedelta(weeks=4)
+        self.book(self.first_week)
+
+    def book(self, day):
+        start = django_timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=9)
+        response = self.client.post(f'/classroom/{self.classroom.id}/book/', {
+            'course_edition_id': 'CE1', 'type': 'CL', 'start': start.isoformat(),
+            'end': (start + timedelta(hours=2)).isoformat(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    def report(self):
+        """Runs the report up to next week and returns the first week aggregated in the database."""
+        with mock.patch.object(analytics, 'compute_weekly_utilization',
+                               wraps=analytics.compute_weekly_utilization) as compute:
+            rows = analytics.weekly_utilization(1, self.first_week, self.current_week + timedelta(weeks=2))
+        return rows, compute.call_args.args[1]
+
+    def test_future_bookings_do_not_recompute_past_weeks(self):
+        self.report()
+        self.book(self.current_week + timedelta(weeks=1))
+        rows, first_computed = self.report()
+        self.assertEqual(first_computed, self.current_week)
+        self.assertEqual(len(rows), 2)
+
+    def test_past_bookings_recompute_past_weeks(self):
+        self.report()
+        self.book(self.first_week + timedelta(weeks=1))
+        rows, first_computed = self.report()
+        self.assertEqual(first_computed, self.first_week)
+        self.assertEqual([row['week'] for row in rows], [self.first_week, self.first_week + timedelta(weeks=1)])
@@ -1,14 +1,31 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from drf_spectacular.utils import OpenApiExample, extend_schema, OpenApiParameter
 from rest_framework import generics, mixins, status
 from rest_framework.response import Response
-from django.db.models import Prefetch
+from rest_framework.views import APIView
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Count, Max
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from classroom.models import Schedule, Classroom
+from classroom.pagination import ClassroomCursorPagination
+from classroom.ical import stream_calendar
+from classroom.analytics import weekly_utilization
+from classroom.importing import PARSERS, import_classrooms, read_lines
+from classroom.caching import cached_response, bump_versions, bump_schedule_versions, faculty_key, \
+    course_edition_key, utilization_key, CLASSROOMS_KEY
 from classroom.serializers import ScheduleSerializer, ClassroomWithoutScheduleSerializer, \
-    ClassroomWithScheduleSerializer, ErrorSerializer
+    ClassroomWithScheduleSerializer, ErrorSerializer, BookingSerializer, BulkBookingReportSerializer, \
+    AvailabilityParametersSerializer, UtilizationParametersSerializer, UtilizationSerializer, \
+    AllocationSerializer, AllocationResultSerializer, ImportResultSerializer, ImportErrorSerializer
+from classroom.scheduling import is_occupied, find_conflicts, available_classrooms, expand_weekly, \
+    lock_classrooms, run_with_retry, allocate_classrooms, MAX_BOOKING_ATTEMPTS
+
+MAX_OCCURRENCES = 200
 
 
 # Create your views here.
@@ -33,9 +50,59 @@ class ClassroomListView(generics.GenericAPIView,
             return Response({
                 'details': 'A faculty_id is needed to filter the Classrooms',
             }, status=status.HTTP_400_BAD_REQUEST)
+        return cached_response(request, 'classroom_list', [faculty_key(request.query_params['faculty_id'])],
+                               lambda: self.list(request, *args, **kwargs))
+
+
+class ClassroomAvailabilityListView(generics.GenericAPIView,
+                                   mixins.ListModelMixin):
+    queryset = Classroom.objects.all()
+    serializer_class = ClassroomWithoutScheduleSerializer
+
+    def get_queryset(self):
+        return available_classrooms(**self.parameters)
+
+    @extend_schema(
+        description="Retrieves the classrooms of a faculty that are free during the whole given window "
+                    "and have at least the given number of seats, smallest first",
+        parameters=[
+            OpenApiParameter(name="faculty_id", required=True, type=int),
+            OpenApiParameter(name="start", required=True, type=datetime),
+            OpenApiParameter(name="end", required=True, type=datetime),
+            OpenApiParameter(name="seats", required=False, type=int),
+        ],
+        responses={200: ClassroomWithoutScheduleSerializer(many=True), 400: ErrorSerializer},
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = AvailabilityParametersSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        self.parameters = serializer.validated_data
         return self.list(request, *args, **kwargs)
 
 
+class ClassroomUtilizationView(APIView):
+
+    @extend_schema(
+        description="Retrieves the weekly occupancy of the classrooms of a faculty, split by schedule type. "
+                    "The occupancy is the booked hours divided by the weekly opening hours. "
+                    "Weeks start on Monday and only classrooms with schedules in a week are listed",
+        parameters=[
+            OpenApiParameter(name="faculty_id", required=True, type=int),
+            OpenApiParameter(name="start", required=True, type=date),
+            OpenApiParameter(name="end", required=True, type=date),
+        ],
+        responses={200: UtilizationSerializer(many=True), 400: ErrorSerializer},
+    )
+    def get(self, request, format=None):
+        serializer = UtilizationParametersSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = weekly_utilization(**serializer.validated_data)
+        return Response(UtilizationSerializer(rows, many=True).data, status=status.HTTP_200_OK)
+
+
 class ClassroomUpdateView(generics.GenericAPIView,
                           mixins.UpdateModelMixin):
     queryset = Classroom.objects.all()
@@ -71,6 +138,15 @@ class ClassroomUpdateView(generics.GenericAPIView,
     def patch(self, request, *args, **kwargs):
         return self.partial_update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        seats = serializer.instance.seats
+        with transaction.atomic():
+            serializer.save()
+            keys = [faculty_key(serializer.instance.faculty_id), CLASSROOMS_KEY]
+            if serializer.instance.seats != seats:
+                keys.append(utilization_key(serializer.instance.faculty_id))
+            bump_versions(keys)
+
 
 class ScheduleCreateView(generics.GenericAPIView,
                          mixins.CreateModelMixin):
@@ -80,41 +156,81 @@ class ScheduleCreateView(generics.GenericAPIView,
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        try:
-            classroom = Classroom.objects.get(pk=kwargs['pk'])
-            if not classroom.is_available:
-                return Response({
-                    'details': 'Classroom is closed for maintenance',
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            start_datetime = serializer.validated_data.get('start')
-            end_datetime = serializer.validated_data.get('end')
-
-            if end_datetime <= start_datetime:
+        booking = dict(serializer.validated_data)
+        booking.pop('classroom', None)
+        recurrence = booking.pop('recurrence', None)
+        occurrences = None
+        if recurrence:
+            # Expanded before the classroom is locked, and never beyond the first rejected occurrence
+            occurrences = expand_weekly(booking['start'], booking['end'], recurrence['until'],
+                                        recurrence['exceptions'], limit=MAX_OCCURRENCES + 1)
+            if not occurrences:
                 return Response({
-                    'details': 'End date must be higher than start date',
+                    'details': 'The recurrence has no occurrences',
                 }, status=status.HTTP_400_BAD_REQUEST)
-
-            if Schedule.objects.all().filter(classroom=classroom, start__gte=start_datetime,
-                                             end__lte=start_datetime).count() != 0 or \
-                    Schedule.objects.all().filter(classroom=classroom, start__lte=start_datetime,
-                                                  end__gte=start_datetime).count() != 0 or \
-                    Schedule.objects.all().filter(classroom=classroom, start__lte=end_datetime,
-                                                  end__gte=end_datetime).count() != 0:
+            if len(occurrences) > MAX_OCCURRENCES:
                 return Response({
-                    'details': 'Classroom is already occupied in that schedule',
+                    'details': f'The recurrence has more than {MAX_OCCURRENCES} occurrences',
                 }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # The classroom row is locked until the booking is committed, so concurrent bookings
+            # of the same classroom are serialized while other classrooms are booked in parallel
+            return run_with_retry(lambda: self.book(kwargs['pk'], booking, occurrences))
+        except IntegrityError:
+            # Raised by the exclusion constraint when a concurrent booking took the slot
+            return Response({
+                'details': 'Classroom is already occupied in that schedule',
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            serializer.validated_data['classroom'] = classroom
-            self.perform_create(serializer)
-            headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-
-        except Classroom.DoesNotExist:
+    def book(self, pk, booking, occurrences):
+        try:
+            classroom = lock_classrooms([pk])[0]
+        except IndexError:
             return Response({
                 'details': 'Classroom not found',
             }, status=status.HTTP_404_NOT_FOUND)
 
+        if not classroom.is_available:
+            return Response({
+                'details': 'Classroom is closed for maintenance',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if booking['end'] <= booking['start']:
+            return Response({
+                'details': 'End date must be higher than start date',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if occurrences:
+            return self.create_recurring(classroom, booking, occurrences)
+
+        if is_occupied(classroom, booking['start'], booking['end']):
+            return Response({
+                'details': 'Classroom is already occupied in that schedule',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        schedule = Schedule.objects.create(classroom=classroom, **booking)
+        bump_schedule_versions([(schedule.course_edition_id, classroom.faculty_id, schedule.start)])
+        data = ScheduleSerializer(schedule).data
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+
+    def create_recurring(self, classroom, booking, occurrences):
+        # Every occurrence is checked against the classroom schedules with a single query
+        conflicts = find_conflicts([(classroom.pk, start, end) for start, end in occurrences])
+        if conflicts:
+            return Response({
+                'details': 'Classroom is already occupied in that schedule',
+                'conflicts': [occurrences[index][0] for index in sorted(conflicts)],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        schedules = Schedule.objects.bulk_create([
+            Schedule(classroom=classroom, course_edition_id=booking['course_edition_id'],
+                     type=booking['type'], start=start, end=end)
+            for start, end in occurrences
+        ])
+        bump_schedule_versions([(booking['course_edition_id'], classroom.faculty_id, start)
+                                for start, _ in occurrences])
+        return Response(ScheduleSerializer(schedules, many=True).data, status=status.HTTP_201_CREATED)
+
     @extend_schema(
         request=ScheduleSerializer,
         examples=[
@@ -143,6 +259,25 @@ class ScheduleCreateView(generics.GenericAPIView,
                     "type": "EX",
                 },
 
+            ),
+            OpenApiExample(
+                name="Create Weekly Class Schedule",
+                description="Create a Class Schedule repeated every week until the given date, "
+                            "except on the given dates",
+                request_only=True,
+                status_codes=[201],
+                value={
+                    "course_edition_id": '507c7f79bcf86cd7994f6c0e',
+                    "start": "2023-02-13T14:00:00Z",
+                    "end": "2023-02-13T16:00:00Z",
+                    "type": "CL",
+                    "recurrence": {
+                        "frequency": "WEEKLY",
+                        "until": "2023-05-29",
+                        "exceptions": ["2023-04-10"],
+                    },
+                },
+
             ),
             OpenApiExample(
                 name="Created Class Successfully",
@@ -225,10 +360,24 @@ class ClassroomScheduleListView(generics.GenericAPIView,
         'type': ['exact'],
     }
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = ClassroomCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
 
-        queryset = Classroom.objects.all().prefetch_related(Prefetch('schedules', queryset=queryset))
+        if isinstance(self.paginator, ClassroomCursorPagination):
+            # Only the classrooms that have matching schedules are walked
+            queryset = Classroom.objects.filter(pk__in=queryset.values('classroom_id')) \
+                .prefetch_related(Prefetch('schedules', queryset=queryset.order_by('start')))
+        else:
+            queryset = Classroom.objects.all().prefetch_related(Prefetch('schedules', queryset=queryset))
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -239,9 +388,13 @@ class ClassroomScheduleListView(generics.GenericAPIView,
         return Response(serializer.data)
 
     @extend_schema(
-        description="Retrieves all classrooms and their schedules for a given courseEdition",
+        description="Retrieves all classrooms and their schedules for a given courseEdition. "
+                    "With pagination=cursor only the classrooms with schedules are returned, "
+                    "paginated with an opaque cursor",
         parameters=[
             OpenApiParameter(name="course_edition_id", required=True, type=str),
+            OpenApiParameter(name="pagination", required=False, enum=['cursor']),
+            OpenApiParameter(name="cursor", required=False, type=str),
         ],
     )
     def get(self, request, *args, **kwargs):
@@ -249,4 +402,307 @@ class ClassroomScheduleListView(generics.GenericAPIView,
             return Response({
                 'details': 'A course_edition_id is needed to filter the Schedules',
             }, status=status.HTTP_400_BAD_REQUEST)
-        return self.list(request, *args, **kwargs)
+        return cached_response(request, 'classroom_schedule_list',
+                               [course_edition_key(request.query_params['course_edition_id']), CLASSROOMS_KEY],
+                               lambda: self.list(request, *args, **kwargs))
+
+
+def calendar_schedules(request):
+    schedules = Schedule.objects.filter(course_edition_id=request.GET.get('course_edition_id'))
+    if request.GET.get('type'):
+        schedules = schedules.filter(type=request.GET['type'])
+    return schedules
+
+
+def calendar_etag(request, *args, **kwargs):
+    if not request.GET.get('course_edition_id'):
+        return None
+    # The count and last id change when schedules are created or deleted, the last update when they are edited
+    aggregate = calendar_schedules(request).aggregate(count=Count('id'), last=Max('id'), updated=Max('updated_at'))
+    updated = aggregate['updated'].timestamp() if aggregate['updated'] else 0
+    return f'W/"{aggregate["count"]}-{aggregate["last"] or 0}-{updated}"'
+
+
+class ScheduleCalendarView(APIView):
+
+    @extend_schema(
+        description="Streams the schedules of a courseEdition as an iCalendar (text/calendar) feed. "
+                    "Supports conditional requests through the ETag header",
+        parameters=[
+            OpenApiParameter(name="course_edition_id", required=True, type=str),
+            OpenApiParameter(name="type", required=False, enum=['CL', 'EX']),
+        ],
+        responses={(200, 'text/calendar'): str, 304: None, 400: ErrorSerializer},
+    )
+    @method_decorator(condition(etag_func=calendar_etag))
+    def get(self, request, format=None):
+        if not request.query_params.get('course_edition_id', None):
+            return Response({
+                'details': 'A course_edition_id is needed to filter the Schedules',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        schedules = calendar_schedules(request).order_by('start', 'id')
+        response = StreamingHttpResponse(stream_calendar(schedules), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="schedules.ics"'
+        return response
+
+
+class ScheduleBulkCreateView(APIView):
+
+    @extend_schema(
+        request=BookingSerializer(many=True),
+        description="Books many schedules, across many classrooms, in a single transaction. "
+                    "Bookings that are invalid or overlap an existing schedule or a previous booking "
+                    "of the list are rejected and the remaining ones are created",
+        examples=[
+            OpenApiExample(
+                name="Book Schedules",
+                description="Book Schedules",
+                request_only=True,
+                value=[
+                    {
+                        "classroom": 1,
+                        "course_edition_id": '507c7f79bcf86cd7994f6c0e',
+                        "start": "2022-12-11T14:00:00Z",
+                        "end": "2022-12-11T16:00:00Z",
+                        "type": "CL",
+                    },
+                    {
+                        "classroom": 1,
+                        "course_edition_id": '507c7f79bcf86cd7994f6c0e',
+                        "start": "2022-12-11T15:00:00Z",
+                        "end": "2022-12-11T17:00:00Z",
+                        "type": "CL",
+                    },
+                ],
+            ),
+            OpenApiExample(
+                name="Booking Report",
+                description="Booking Report",
+                response_only=True,
+                status_codes=[200],
+                value={
+                    "accepted": [{
+                        "index": 0,
+                        "schedule": {
+                            "id": 1,
+                            "classroom": 1,
+                            "course_edition_id": '507c7f79bcf86cd7994f6c0e',
+                            "start": "2022-12-11T14:00:00Z",
+                            "end": "2022-12-11T16:00:00Z",
+                            "type": "CL",
+                        },
+                    }],
+                    "rejected": [{
+                        "index": 1,
+                        "details": "Classroom is already occupied in that schedule",
+                    }],
+                },
+            ),
+            OpenApiExample(
+                name="A list of bookings is needed",
+                status_codes=[400],
+                response_only=True,
+                description="A list of bookings is needed",
+                value={'details': 'A list of bookings is needed'},
+            ),
+        ],
+        responses={200: BulkBookingReportSerializer, 400: ErrorSerializer})
+    def post(self, request, format=None):
+        if not isinstance(request.data, list):
+            return Response({
+                'details': 'A list of bookings is needed',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rejected = []
+        candidates = []
+        for index, data in enumerate(request.data):
+            serializer = BookingSerializer(data=data)
+            if serializer.is_valid():
+                candidates.append((index, serializer.validated_data))
+            else:
+                rejected.append({'index': index, 'details': serializer.errors})
+
+        try:
+            accepted, unavailable = run_with_retry(lambda: self.book(candidates))
+        except IntegrityError:
+            # Raised by the exclusion constraint when a concurrent booking took one of the slots
+            return Response({
+                'details': 'Classroom is already occupied in that schedule',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rejected += unavailable
+        rejected.sort(key=lambda rejection: rejection['index'])
+        return Response({
+            'accepted': [{'index': index, 'schedule': BookingSerializer(schedule).data} for index, schedule in accepted],
+            'rejected': rejected,
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def book(candidates):
+        # The classrooms are locked in a consistent order, so concurrent bulk bookings can not deadlock
+        classrooms = {classroom.pk: classroom
+                      for classroom in lock_classrooms({booking['classroom_id'] for _, booking in candidates})}
+
+        rejected = []
+        bookings = []
+        for index, booking in candidates:
+            classroom = classrooms.get(booking['classroom_id'])
+            if classroom is None:
+                rejected.append({'index': index, 'details': 'Classroom not found'})
+            elif not classroom.is_available:
+                rejected.append({'index': index, 'details': 'Classroom is closed for maintenance'})
+            else:
+                bookings.append((index, booking))
+
+        conflicts = find_conflicts([(booking['classroom_id'], booking['start'], booking['end'])
+                                    for _, booking in bookings])
+        accepted = []
+        for position, (index, booking) in enumerate(bookings):
+            if position in conflicts:
+                rejected.append({'index': index, 'details': 'Classroom is already occupied in that schedule'})
+            else:
+                accepted.append((index, Schedule(**booking)))
+
+        Schedule.objects.bulk_create([schedule for _, schedule in accepted])
+        bump_schedule_versions([
+            (schedule.course_edition_id, classrooms[schedule.classroom_id].faculty_id, schedule.start)
+            for _, schedule in accepted
+        ])
+        return accepted, rejected
+
+
+class ClassroomAllocationView(APIView):
+
+    @extend_schema(
+        request=AllocationSerializer,
+        description="Books, in a single transaction, the fewest free classrooms of a faculty that together "
+                    "have enough seats for the given number of students",
+        examples=[
+            OpenApiExample(
+                name="Allocate Exam Classrooms",
+                description="Allocate Exam Classrooms",
+                request_only=True,
+                value={
+                    "faculty_id": 1,
+                    "course_edition_id": '507c7f79bcf86cd7994f6c0e',
+                    "start": "2023-01-16T09:00:00Z",
+                    "end": "2023-01-16T12:00:00Z",
+                    "students": 600,
+                    "type": "EX",
+                },
+            ),
+            OpenApiExample(
+                name="Not enough free seats",
+                status_codes=[400],
+                response_only=True,
+                description="Not enough free seats",
+                value={'details': 'There are not enough free seats for the given students'},
+            ),
+        ],
+        responses={201: AllocationResultSerializer, 400: ErrorSerializer})
+    def post(self, request, format=None):
+        serializer = AllocationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        allocation = serializer.validated_data
+
+        for _ in range(MAX_BOOKING_ATTEMPTS):
+            classrooms = allocate_classrooms(
+                available_classrooms(allocation['faculty_id'], allocation['start'], allocation['end']),
+                allocation['students'])
+            if classrooms is None:
+                return Response({
+                    'details': 'There are not enough free seats for the given students',
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                schedules = run_with_retry(lambda: self.book(allocation, classrooms))
+            except IntegrityError:
+                # Raised by the exclusion constraint when a concurrent booking took one of the classrooms
+                schedules = None
+            if schedules is not None:
+                return Response({
+                    'seats': sum(classroom.seats for classroom in classrooms),
+                    'schedules': ScheduleSerializer(schedules, many=True).data,
+                }, status=status.HTTP_201_CREATED)
+
+        return Response({
+            'details': 'Classroom is already occupied in that schedule',
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def book(allocation, classrooms):
+        """
+        Books the chosen classrooms, unless one of them was booked or closed since it was
+        chosen, in which case None is returned so a new allocation is computed.
+        """
+        locked = lock_classrooms([classroom.pk for classroom in classrooms])
+        if len(locked) != len(classrooms) or not all(classroom.is_available for classroom in locked):
+            return None
+        if find_conflicts([(classroom.pk, allocation['start'], allocation['end']) for classroom in locked]):
+            return None
+
+        schedules = Schedule.objects.bulk_create([
+            Schedule(classroom=classroom, course_edition_id=allocation['course_edition_id'],
+                     type=allocation['type'], start=allocation['start'], end=allocation['end'])
+            for classroom in locked
+        ])
+        bump_schedule_versions([(allocation['course_edition_id'], classroom.faculty_id, allocation['start'])
+                                for classroom in locked])
+        return schedules
+
+
+class ClassroomImportView(APIView):
+    CONTENT_TYPES = {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+    }
+
+    @extend_schema(
+        request={'text/csv': str, 'application/x-ndjson': str},
+        description="Imports classrooms from a CSV body, with a name,is_available,faculty_id,seats header, "
+                    "or from a NDJSON body with one classroom per line. The body is validated as it is read "
+                    "and nothing is imported if any row is invalid",
+        examples=[
+            OpenApiExample(
+                name="Imported Successfully",
+                description="Imported Successfully",
+                response_only=True,
+                status_codes=[201],
+                value={'imported': 500},
+            ),
+            OpenApiExample(
+                name="Invalid rows",
+                description="Invalid rows",
+                response_only=True,
+                status_codes=[400],
+                value={
+                    'details': 'The body has invalid rows, no classroom was imported',
+                    'errors': [{'line': 3, 'details': {'seats': ['This field is required.']}}],
+                },
+            ),
+        ],
+        responses={201: ImportResultSerializer, 400: ImportErrorSerializer, 415: ErrorSerializer})
+    def post(self, request, format=None):
+        file_format = self.CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+        if file_format is None:
+            return Response({
+                'details': 'The body must be text/csv or application/x-ndjson',
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # The body is read line by line instead of being parsed into request.data
+        lines = read_lines(request.stream) if request.stream else iter(())
+        try:
+            imported, errors = import_classrooms(PARSERS[file_format](lines))
+        except UnicodeDecodeError:
+            return Response({
+                'details': 'The body must be encoded in UTF-8',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if errors:
+            return Response({
+                'details': 'The body has invalid rows, no classroom was imported',
+                'errors': errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'imported': imported}, status=status.HTTP_201_CREATED)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 
 import os
 import sys
+import tempfile
 from pathlib import Path
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
@@ -166,6 +167,28 @@ REST_FRAMEWORK = {
     }
 }
 
+# Shared cache, local memory unless a shared backend (e.g. memcached or redis) is configured
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv("CACHE_LOCATION", ''),
+    }
+}
+
+# Maximum number of responses kept by each worker and time they are kept in the shared cache
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", str(60 * 60)))
+
+# Destination of the events relayed from the outbox, "kafka" or "file"
+EVENT_SINK = os.getenv("EVENT_SINK", "kafka")
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "107.23.7.83:9092")
+EVENT_FILE_PATH = os.getenv("EVENT_FILE_PATH", str(BASE_DIR / "events.jsonl"))
+
+# Rendered certificates, kept on disk up to the given size and rendered by a pool of processes
+CERTIFICATE_CACHE_DIR = os.getenv("CERTIFICATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "certificates"))
+CERTIFICATE_CACHE_MAX_BYTES = int(os.getenv("CERTIFICATE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CERTIFICATE_RENDER_WORKERS = int(os.getenv("CERTIFICATE_RENDER_WORKERS", str(os.cpu_count() or 1)))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Faculty Service',
     'VERSION': '1.0.0',
@@ -12,16 +12,20 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 
     path('faculties/', views.FacultyListView.as_view()),
+    path('faculties/nearby/', views.FacultyNearbyListView.as_view()),
     path('faculty/<int:pk>/', views.FacultyDetailsView.as_view()),
     path('faculty/', views.FacultyCreateView.as_view()),
+    path('faculty/bulk/', views.FacultyBulkCreateView.as_view()),
 
     path('articles/', views.ArticleListView.as_view()),
     path('article/<int:pk>/', views.ArticleDetailsView.as_view()),
     path('article/', views.ArticleCreateView.as_view()),
+    path('articles/import/', views.ArticleImportView.as_view()),
 
     path('sentry-debug/', trigger_error),
 
     path('certificate/', views.CertificateCreateView.as_view()),
+    path('certificates/batch/', views.CertificateBatchView.as_view()),
 
     # OpenAPI
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -0,0 +1,116 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.cache import get_conditional_response
+from prometheus_client import Counter
+from rest_framework.response import Response
+
+from faculty.models import CacheVersion
+
+DIRECTORY_KEY = 'directory'
+
+
+def articles_key(faculty_id):
+    return f'articles:{faculty_id}'
+
+
+cache_hits = Counter('faculty_response_cache_hits_total', 'Response cache hits', ['view', 'level'])
+cache_misses = Counter('faculty_response_cache_misses_total', 'Response cache misses', ['view'])
+
+
+class LRUCache:
+    """Thread safe in-process cache that evicts the least recently used entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LRUCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def current_versions(keys):
+    versions = dict(CacheVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+def bump_versions(keys):
+    """Invalidates the cached responses of the given keys, in every worker."""
+    for key in set(keys):
+        if not CacheVersion.objects.filter(key=key).update(version=F('version') + 1):
+            _, created = CacheVersion.objects.get_or_create(key=key, defaults={'version': 1})
+            if not created:
+                CacheVersion.objects.filter(key=key).update(version=F('version') + 1)
+
+
+def response_cache_key(request, view_name, keys):
+    """Key of the response for the request path and query parameters and the current versions of the keys."""
+    params = sorted((name, values) for name, values in request.query_params.lists())
+    identity = repr((request.get_host(), request.path, params, keys, current_versions(keys)))
+    return f'response:{view_name}:{hashlib.sha1(identity.encode()).hexdigest()}'
+
+
+def cached_response(request, view_name, keys, build, etag=False):
+    """
+    Returns the response data cached for the request path and query parameters and the
+    current versions of the keys, looking first in the worker memory and then in the shared
+    Django cache, or builds and caches it. The versions are kept in the database, so a
+    write handled by any worker invalidates the entries of every worker.
+
+    With etag, the cache key is also the ETag of the response and a matching If-None-Match
+    gets 304 Not Modified without any lookup.
+    """
+    cache_key = response_cache_key(request, view_name, keys)
+    tag = f'W/"{cache_key.rsplit(":", 1)[1]}"'
+    if etag:
+        not_modified = get_conditional_response(request, etag=tag)
+        if not_modified is not None:
+            return not_modified
+
+    response = cached_data_response(view_name, cache_key, build)
+    if etag and response.status_code == 200:
+        response['ETag'] = tag
+    return response
+
+
+def cached_data_response(view_name, cache_key, build):
+    data = local_cache.get(cache_key)
+    if data is not None:
+        cache_hits.labels(view=view_name, level='local').inc()
+        return Response(data)
+
+    data = cache.get(cache_key)
+    if data is not None:
+        cache_hits.labels(view=view_name, level='shared').inc()
+        local_cache.set(cache_key, data)
+        return Response(data)
+
+    cache_misses.labels(view=view_name).inc()
+    response = build()
+    if response.status_code == 200:
+        local_cache.set(cache_key, response.data)
+        cache.set(cache_key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+    return response
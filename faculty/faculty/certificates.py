@@ -0,0 +1,263 @@
+import functools
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from faculty.stamping import PdfTemplate
+
+# Bump whenever the layout changes so that stored certificates are rendered again
+TEMPLATE_VERSION = 2
+
+
+def certificate_key(student_id, certificate_type):
+    content = f'{TEMPLATE_VERSION}:{student_id}:{certificate_type}'
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@functools.lru_cache
+def certificate_template(version):
+    # Static page of the given layout version, built once per process
+    return PdfTemplate("Certificate", [(200, 500, "This is an excellent certificate.")])
+
+
+def render_certificate(student_id, certificate_type):
+    return certificate_template(TEMPLATE_VERSION).stamp([
+        (200, 480, f"Student id: {student_id}"),
+        (200, 460, f"Certificate type: {certificate_type}"),
+    ])
+
+
+class CertificateStore:
+    """
+    Rendered certificates on disk, named by their key. The modification time of a file is
+    refreshed when it is read, the least recently used files are evicted above max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+        self.lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.pdf')
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, content):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, readers never see a partial file
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(content)
+        os.replace(temporary, path)
+
+        with self.lock:
+            if self.size is None:
+                self.size = self.scan_size()
+            else:
+                self.size += len(content)
+            if self.size > self.max_bytes:
+                self.evict()
+        return path
+
+    def files(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                for file in os.scandir(entry.path):
+                    if file.name.endswith('.pdf'):
+                        yield file
+
+    def scan_size(self):
+        return sum(file.stat().st_size for file in self.files())
+
+    def evict(self):
+        # Other workers share the directory, the size is recomputed from the files themselves
+        files = sorted(((file.stat(), file.path) for file in self.files()), key=lambda item: item[0].st_mtime)
+        self.size = sum(stat.st_size for stat, _ in files)
+        target = self.max_bytes * 0.9
+        for stat, path in files:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= stat.st_size
+
+
+class CertificateRenderer:
+    """
+    Serves certificates from the store and renders the missing ones in a process pool, so that
+    rendering does not hold the interpreter of the worker. Concurrent requests for the same
+    certificate wait for a single rendering. When a process of the pool dies, killed by the
+    OOM killer for instance, the pool is replaced and the rendering is submitted once more.
+    """
+
+    def __init__(self, store, workers):
+        self.store = store
+        self.workers = workers
+        self.pool = None
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self.pool
+
+    def discard_pool(self, pool):
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, student_id, certificate_type):
+        """Returns the pool and the future of the rendering submitted to it."""
+        pool = self.get_pool()
+        try:
+            return pool, pool.submit(render_certificate, student_id, certificate_type)
+        except BrokenProcessPool:
+            self.discard_pool(pool)
+            pool = self.get_pool()
+            return pool, pool.submit(render_certificate, student_id, certificate_type)
+
+    def submit(self, student_id, certificate_type):
+        """Returns a future of the path of the stored certificate."""
+        key = certificate_key(student_id, certificate_type)
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None:
+                return future
+        path = self.store.get(key)
+        if path is not None:
+            return ResolvedFuture(path)
+
+        pool, rendering = self.render(student_id, certificate_type)
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None:
+                rendering.cancel()
+                return future
+            future = StoredFuture(self, key, pool, rendering, (student_id, certificate_type))
+            self.pending[key] = future
+        return future
+
+    def get(self, student_id, certificate_type):
+        return self.submit(student_id, certificate_type).result()
+
+    def open(self, student_id, certificate_type):
+        try:
+            return open(self.get(student_id, certificate_type), 'rb')
+        except FileNotFoundError:
+            # Evicted between the lookup and the opening
+            return open(self.get(student_id, certificate_type), 'rb')
+
+
+class ResolvedFuture:
+    def __init__(self, path):
+        self.path = path
+
+    def result(self):
+        return self.path
+
+
+class StoredFuture:
+    """Stores the rendered certificate once and hands the path to every waiter."""
+
+    def __init__(self, renderer, key, pool, rendering, arguments):
+        self.renderer = renderer
+        self.key = key
+        self.pool = pool
+        self.rendering = rendering
+        self.arguments = arguments
+        self.lock = threading.Lock()
+        self.path = None
+
+    def result(self):
+        with self.lock:
+            if self.path is None:
+                try:
+                    try:
+                        content = self.rendering.result()
+                    except BrokenProcessPool:
+                        # A process of the pool died while rendering this or another certificate
+                        self.renderer.discard_pool(self.pool)
+                        _, rendering = self.renderer.render(*self.arguments)
+                        content = rendering.result()
+                    self.path = self.renderer.store.put(self.key, content)
+                finally:
+                    with self.renderer.lock:
+                        self.renderer.pending.pop(self.key, None)
+            return self.path
+
+
+class ZipStream(io.RawIOBase):
+    """Unseekable file collecting what zipfile writes, drained after each entry."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_certificates_zip(student_ids, certificate_type):
+    """
+    Yields a ZIP archive of the certificates, in the order of student_ids. Renderings are kept
+    a few ahead of the archive so that every process of the pool is busy, while the memory used
+    stays bounded by the window whatever the number of certificates.
+    """
+    stream = ZipStream()
+    window = deque()
+    student_ids = iter(student_ids)
+
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        while True:
+            while len(window) < renderer.workers * 2:
+                student_id = next(student_ids, None)
+                if student_id is None:
+                    break
+                window.append((student_id, renderer.submit(student_id, certificate_type)))
+            if not window:
+                break
+            student_id, future = window.popleft()
+            name = f'{student_id}_{certificate_type.lower()}.pdf'
+            try:
+                archive.write(future.result(), arcname=name)
+            except FileNotFoundError:
+                # Evicted before being archived
+                archive.write(renderer.get(student_id, certificate_type), arcname=name)
+            yield stream.drain()
+    yield stream.drain()
+
+
+renderer = CertificateRenderer(
+    CertificateStore(settings.CERTIFICATE_CACHE_DIR, settings.CERTIFICATE_CACHE_MAX_BYTES),
+    settings.CERTIFICATE_RENDER_WORKERS,
+)
@@ -0,0 +1,52 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def row_validators(queryset, pk, *fields):
+    """
+    ETag and last modification of a single row, from the given modification date fields.
+    Returns (None, None) when the row does not exist.
+    """
+    dates = queryset.filter(pk=pk).values_list(*fields).first()
+    if dates is None:
+        return None, None
+    last_modified = max(date for date in dates if date is not None)
+    return f'W/"{pk}-{last_modified.timestamp():.6f}"', last_modified
+
+
+def aggregate_validators(queryset, *fields):
+    """
+    ETag of a list, from its count, greatest id and latest modification dates, computed by a
+    single aggregate query. A deletion changes the count and a creation or update the greatest
+    id or modification date. No last modification is given, as a deletion does not move it.
+    """
+    aggregate = queryset.order_by().aggregate(
+        count=Count('id'), last=Max('id'),
+        **{f'modified_{index}': Max(field) for index, field in enumerate(fields)})
+    dates = [aggregate[f'modified_{index}'] for index in range(len(fields))]
+    last_modified = max((date for date in dates if date is not None), default=None)
+    timestamp = last_modified.timestamp() if last_modified else 0
+    return f'W/"{aggregate["count"]}-{aggregate["last"] or 0}-{timestamp:.6f}"', None
+
+
+def conditional_response(request, validators, build):
+    """
+    Returns 304 Not Modified when If-None-Match or If-Modified-Since match the validators,
+    without building the response, otherwise the built response with its ETag and Last-Modified.
+    """
+    etag, last_modified = validators
+    if etag is None:
+        return build()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        return response
+
+    response = build()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
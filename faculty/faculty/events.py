@@ -0,0 +1,82 @@
+import json
+
+from confluent_kafka import Producer
+from django.conf import settings
+from sentry_sdk import capture_message
+
+from faculty.models import OutboxEvent
+
+TOPIC_FACULTY = 'faculty'
+
+# Seconds after which an unacknowledged message is reported as failed
+DELIVERY_TIMEOUT = 30
+
+
+def publish_event(topic: str, event: dict):
+    """Adds an event to the outbox, it is sent only if the current transaction commits."""
+    return OutboxEvent.objects.create(topic=topic, payload=json.dumps(event))
+
+
+class KafkaSink:
+    def __init__(self):
+        self.producer = Producer(**{
+            'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
+            'enable.idempotence': True,
+            'message.timeout.ms': DELIVERY_TIMEOUT * 1000,
+        })
+
+    def send(self, events):
+        """
+        Produces the events and returns the ids of those acknowledged by the broker. No event is
+        produced after a failed delivery is reported, as the relay sends them again anyway.
+        """
+        delivered = set()
+        failed = []
+
+        def callback(event_id):
+            def on_delivery(err, msg):
+                if err is None:
+                    delivered.add(event_id)
+                else:
+                    failed.append(event_id)
+                    capture_message(f'Kafka delivery of outbox event {event_id} failed: {err}')
+            return on_delivery
+
+        for event in events:
+            if failed:
+                break
+            while True:
+                try:
+                    self.producer.produce(event.topic, event.payload, callback=callback(event.pk))
+                    break
+                except BufferError:
+                    # Local queue full, serve delivery reports to make room
+                    self.producer.poll(1)
+            self.producer.poll(0)
+
+        # Returns once every message is acknowledged or timed out, so none is left in flight
+        self.producer.flush()
+        return delivered
+
+
+class FileSink:
+    """Appends the events as JSON lines to a file, stands in for the broker in development and tests."""
+
+    def __init__(self):
+        self.path = settings.EVENT_FILE_PATH
+
+    def send(self, events):
+        with open(self.path, 'a') as file:
+            for event in events:
+                file.write(json.dumps({'topic': event.topic, 'payload': json.loads(event.payload)}) + '\n')
+        return {event.pk for event in events}
+
+
+SINKS = {
+    'kafka': KafkaSink,
+    'file': FileSink,
+}
+
+
+def get_sink():
+    return SINKS[settings.EVENT_SINK]()
@@ -0,0 +1,62 @@
+import math
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+# Size, in degrees, of the cells of the grid that indexes the locations
+GRID_CELL_DEGREES = 0.5
+GRID_COLUMNS = int(360 / GRID_CELL_DEGREES)
+GRID_ROWS = int(180 / GRID_CELL_DEGREES)
+
+
+def grid_row(latitude):
+    return min(int((latitude + 90) // GRID_CELL_DEGREES), GRID_ROWS - 1)
+
+
+def grid_column(longitude):
+    return min(int((longitude + 180) // GRID_CELL_DEGREES), GRID_COLUMNS - 1)
+
+
+def grid_cell(latitude, longitude):
+    """Number of the grid cell of a point, cells being numbered row by row from the south west."""
+    return grid_row(latitude) * GRID_COLUMNS + grid_column(longitude)
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """Great circle distance, in kilometers, between two points."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box_cells(latitude, longitude, radius, field='grid_cell'):
+    """
+    Q object matching, on the given field, the grid cells of the bounding box of the circle with the given center
+    and radius in kilometers. Each row of cells is a range of cell numbers, split in two when
+    the box crosses the antimeridian.
+    """
+    delta_latitude = math.degrees(radius / EARTH_RADIUS_KM)
+    south = max(-90.0, latitude - delta_latitude)
+    north = min(90.0, latitude + delta_latitude)
+
+    if south <= -90.0 or north >= 90.0:
+        # The circle contains a pole, so it spans every longitude
+        column_ranges = [(0, GRID_COLUMNS - 1)]
+    else:
+        delta_longitude = math.degrees(math.asin(
+            min(1.0, math.sin(radius / EARTH_RADIUS_KM) / math.cos(math.radians(latitude)))))
+        west, east = longitude - delta_longitude, longitude + delta_longitude
+        if west < -180.0:
+            column_ranges = [(grid_column(west + 360), GRID_COLUMNS - 1), (0, grid_column(east))]
+        elif east > 180.0:
+            column_ranges = [(grid_column(west), GRID_COLUMNS - 1), (0, grid_column(east - 360))]
+        else:
+            column_ranges = [(grid_column(west), grid_column(east))]
+
+    cells = Q()
+    for row in range(grid_row(south), grid_row(north) + 1):
+        for first, last in column_ranges:
+            cells |= Q(**{f'{field}__range': (row * GRID_COLUMNS + first, row * GRID_COLUMNS + last)})
+    return cells
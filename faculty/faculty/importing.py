@@ -0,0 +1,97 @@
+import json
+
+from rest_framework.exceptions import ValidationError
+
+from faculty.caching import articles_key, bump_versions
+from faculty.models import Article
+from faculty.serializers import ArticleImportSerializer
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+READ_SIZE = 64 * 1024
+
+
+def read_lines(stream):
+    """
+    Yields the lines of a binary stream, decoded as UTF-8. Without a size, readline of the
+    request stream loads the whole remaining body, the lines are read by parts instead.
+    """
+    parts = []
+    for part in iter(lambda: stream.readline(READ_SIZE), b''):
+        parts.append(part)
+        if part.endswith(b'\n'):
+            yield b''.join(parts).decode('utf-8')
+            parts = []
+    if parts:
+        yield b''.join(parts).decode('utf-8')
+
+
+def parse_ndjson(lines):
+    """Yields (line number, row, error) for each non blank line of a NDJSON document."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, None, f'Invalid JSON: {error}'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Each line must be a JSON object'
+            continue
+        yield number, row, None
+
+
+def insert_batch(batch, faculty_ids):
+    Article.objects.bulk_create(batch)
+    faculty_ids.update(article.faculty_id for article in batch)
+    return len(batch)
+
+
+def insert_articles(records, faculty_ids):
+    imported = 0
+    rejected = 0
+    errors = []
+    batch = []
+
+    # A single serializer validates every row, building its fields once instead of once per row
+    validator = ArticleImportSerializer()
+
+    for line, row, error in records:
+        if error is None:
+            try:
+                row = validator.run_validation(row)
+            except ValidationError as validation_error:
+                error = validation_error.detail
+
+        if error is not None:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'line': line, 'details': error})
+            continue
+
+        batch.append(Article(**row))
+        if len(batch) == BATCH_SIZE:
+            imported += insert_batch(batch, faculty_ids)
+            batch = []
+
+    if batch:
+        imported += insert_batch(batch, faculty_ids)
+
+    return imported, rejected, errors
+
+
+def import_articles(records):
+    """
+    Validates the (line number, row, error) records one at a time and inserts the valid
+    articles in batches with bulk_create. Invalid records are reported and skipped, the
+    other records are still imported.
+    Returns the number of imported articles, the number of rejected records and the errors
+    of the first MAX_REPORTED_ERRORS of them.
+    """
+    faculty_ids = set()
+    try:
+        return insert_articles(records, faculty_ids)
+    finally:
+        # Also when the import stops midway, the batches already inserted are visible
+        bump_versions([articles_key(faculty_id) for faculty_id in faculty_ids])
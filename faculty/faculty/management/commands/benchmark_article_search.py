@@ -0,0 +1,62 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from faculty.models import Article, Faculty
+from faculty.search import search_articles
+
+# Synthetic vocabulary, large enough for the searched words to be selective as in real text
+VOCABULARY = [''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 10))) for _ in range(20000)]
+
+
+def sentence(length):
+    return ' '.join(random.choice(VOCABULARY) for _ in range(length))
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the full-text article search against the former icontains search. ' \
+           'Everything is done inside a transaction that is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            faculty = Faculty.objects.create(name='BENCH')
+            begin = time.perf_counter()
+            for offset in range(0, options['articles'], 10000):
+                Article.objects.bulk_create([
+                    Article(faculty=faculty, title=sentence(3), author=sentence(2), content=sentence(60))
+                    for _ in range(min(10000, options['articles'] - offset))
+                ])
+            self.stdout.write(f"Inserted {options['articles']} articles in {time.perf_counter() - begin:.1f}s")
+
+            terms = [random.choice(VOCABULARY) for _ in range(options['queries'])]
+            articles = Article.objects.filter(faculty=faculty)
+
+            def icontains(text):
+                query = Q()
+                for word in text.split():
+                    query &= Q(title__icontains=word) | Q(author__icontains=word)
+                return list(articles.filter(query).order_by('-created_at')[:25])
+
+            def full_text(text):
+                return list(search_articles(articles, text).order_by('-rank', '-created_at', '-id')[:25])
+
+            self.report('icontains (title, author)', terms, icontains)
+            self.report('full-text (title, author, content)', terms, full_text)
+
+            transaction.set_rollback(True)
+
+    def report(self, name, terms, search):
+        begin = time.perf_counter()
+        for text in terms:
+            search(text)
+        elapsed = time.perf_counter() - begin
+        self.stdout.write(f'{name}: {len(terms)} searches in {elapsed:.3f}s '
+                          f'({elapsed / len(terms) * 1000:.1f} ms/search)')
@@ -0,0 +1,54 @@
+import io
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from reportlab.pdfgen import canvas
+
+from faculty.certificates import render_certificate
+
+
+def render_with_canvas(student_id, certificate_type):
+    # Former rendering, the whole page drawn for every certificate
+    buffer = io.BytesIO()
+
+    pdf = canvas.Canvas(buffer)
+
+    pdf.setTitle("Certificate")
+    pdf.drawString(200, 500, "This is an excellent certificate.")
+    pdf.drawString(200, 480, f"Student id: {student_id}")
+    pdf.drawString(200, 460, f"Certificate type: {certificate_type}")
+    pdf.showPage()
+    pdf.save()
+
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the template-stamped certificate rendering against the ReportLab canvas rendering.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=5000)
+
+    def measure(self, name, render, documents):
+        render(0, 'ENROLLMENT_CERTIFICATE')
+
+        begin = time.perf_counter()
+        for student_id in range(documents):
+            render(student_id, 'ENROLLMENT_CERTIFICATE')
+        elapsed = time.perf_counter() - begin
+
+        tracemalloc.start()
+        render(documents, 'ENROLLMENT_CERTIFICATE')
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(f'{name:8} {elapsed / documents * 1e6:9.1f} us/document '
+                          f'{peak / 1024:9.1f} KiB peak allocation')
+        return elapsed
+
+    def handle(self, *args, **options):
+        documents = options['documents']
+        before = self.measure('canvas', render_with_canvas, documents)
+        after = self.measure('stamped', render_certificate, documents)
+        self.stdout.write(f'Speedup x{before / after:.1f}')
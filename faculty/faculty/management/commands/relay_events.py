@@ -0,0 +1,50 @@
+import itertools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from faculty.events import get_sink
+from faculty.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = 'Publishes the events of the outbox in batches and deletes them once acknowledged. ' \
+           'Delivery is at least once: an event is sent again if the relay stops before deleting it, ' \
+           'and the events following a failed one are sent again after it, so they keep their order.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Stop once the outbox is empty, or fail when a batch can not be delivered')
+
+    def relay_batch(self, sink, batch_size):
+        with transaction.atomic():
+            # Locked rows are skipped so that several relays can run side by side
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+            if not events:
+                return 0, 0
+            acknowledged = sink.send(events)
+            # Only the events before the first failed one are deleted, the next batch starts again
+            # from it, so the last copy a consumer receives of each event comes in outbox order
+            delivered = [event.pk for event in itertools.takewhile(lambda event: event.pk in acknowledged, events)]
+            OutboxEvent.objects.filter(pk__in=delivered).delete()
+        return len(events), len(delivered)
+
+    def handle(self, *args, **options):
+        sink = get_sink()
+        while True:
+            sent, delivered = self.relay_batch(sink, options['batch_size'])
+            if sent:
+                self.stdout.write(f'Relayed {delivered}/{sent} events')
+            if delivered < sent:
+                if options['once'] and not delivered:
+                    raise CommandError(f'No event of the batch could be delivered, {sent} events are left')
+                # Broker unavailable or rejecting, the failed events are retried after a pause
+                time.sleep(options['interval'])
+            elif not sent:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,88 @@
+from django.db import migrations
+
+POSTGRESQL_SEARCH = [
+    'ALTER TABLE faculty_article ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION faculty_article_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.content, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER faculty_article_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author, content ON faculty_article
+    FOR EACH ROW EXECUTE FUNCTION faculty_article_search_vector_update()
+    """,
+    'UPDATE faculty_article SET title = title',
+    'CREATE INDEX faculty_article_search_vector_gin ON faculty_article USING gin (search_vector)',
+]
+
+POSTGRESQL_SEARCH_REVERSE = [
+    'DROP TRIGGER IF EXISTS faculty_article_search_vector_trigger ON faculty_article',
+    'DROP FUNCTION IF EXISTS faculty_article_search_vector_update()',
+    'ALTER TABLE faculty_article DROP COLUMN IF EXISTS search_vector',
+]
+
+# External content FTS5 table, kept in sync with faculty_article by triggers
+SQLITE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE faculty_article_fts USING fts5(
+        title, author, content, content='faculty_article', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER faculty_article_fts_insert AFTER INSERT ON faculty_article BEGIN
+        INSERT INTO faculty_article_fts(rowid, title, author, content)
+        VALUES (new.id, new.title, new.author, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER faculty_article_fts_delete AFTER DELETE ON faculty_article BEGIN
+        INSERT INTO faculty_article_fts(faculty_article_fts, rowid, title, author, content)
+        VALUES ('delete', old.id, old.title, old.author, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER faculty_article_fts_update AFTER UPDATE ON faculty_article BEGIN
+        INSERT INTO faculty_article_fts(faculty_article_fts, rowid, title, author, content)
+        VALUES ('delete', old.id, old.title, old.author, old.content);
+        INSERT INTO faculty_article_fts(rowid, title, author, content)
+        VALUES (new.id, new.title, new.author, new.content);
+    END
+    """,
+    "INSERT INTO faculty_article_fts(faculty_article_fts) VALUES ('rebuild')",
+]
+
+SQLITE_SEARCH_REVERSE = [
+    'DROP TRIGGER IF EXISTS faculty_article_fts_insert',
+    'DROP TRIGGER IF EXISTS faculty_article_fts_delete',
+    'DROP TRIGGER IF EXISTS faculty_article_fts_update',
+    'DROP TABLE IF EXISTS faculty_article_fts',
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRESQL_SEARCH, 'sqlite': SQLITE_SEARCH}),
+            run_statements({'postgresql': POSTGRESQL_SEARCH_REVERSE, 'sqlite': SQLITE_SEARCH_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty', '0002_article_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['faculty', 'created_at', 'id'], name='article_faculty_created'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:07
+
+from django.db import migrations, models
+import django_prometheus.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty', '0003_article_faculty_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            bases=(django_prometheus.models.ExportModelOperationsMixin('cacheversion'), models.Model),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+from faculty.geo import grid_cell
+
+
+def fill_grid_cells(apps, schema_editor):
+    Location = apps.get_model('faculty', 'Location')
+    locations = list(Location.objects.all())
+    for location in locations:
+        location.grid_cell = grid_cell(location.latitude, location.longitude)
+    Location.objects.bulk_update(locations, ['grid_cell'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty', '0004_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='grid_cell',
+            field=models.PositiveIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_grid_cells, migrations.RunPython.noop),
+    ]
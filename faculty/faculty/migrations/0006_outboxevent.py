@@ -0,0 +1,24 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:10
+
+from django.db import migrations, models
+import django_prometheus.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty', '0005_location_grid_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('payload', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            bases=(django_prometheus.models.ExportModelOperationsMixin('outboxevent'), models.Model),
+        ),
+    ]
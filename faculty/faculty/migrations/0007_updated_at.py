@@ -0,0 +1,65 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+# Adding a column remakes faculty_article on SQLite, which drops the triggers keeping the
+# full-text index of migration 0002 in sync, they are created again around the change
+SQLITE_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS faculty_article_fts_insert',
+    'DROP TRIGGER IF EXISTS faculty_article_fts_delete',
+    'DROP TRIGGER IF EXISTS faculty_article_fts_update',
+    """
+    CREATE TRIGGER faculty_article_fts_insert AFTER INSERT ON faculty_article BEGIN
+        INSERT INTO faculty_article_fts(rowid, title, author, content)
+        VALUES (new.id, new.title, new.author, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER faculty_article_fts_delete AFTER DELETE ON faculty_article BEGIN
+        INSERT INTO faculty_article_fts(faculty_article_fts, rowid, title, author, content)
+        VALUES ('delete', old.id, old.title, old.author, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER faculty_article_fts_update AFTER UPDATE ON faculty_article BEGIN
+        INSERT INTO faculty_article_fts(faculty_article_fts, rowid, title, author, content)
+        VALUES ('delete', old.id, old.title, old.author, old.content);
+        INSERT INTO faculty_article_fts(rowid, title, author, content)
+        VALUES (new.id, new.title, new.author, new.content);
+    END
+    """,
+]
+
+
+def create_sqlite_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty', '0006_outboxevent'),
+    ]
+
+    operations = [
+        # Reverse only, after the column is removed
+        migrations.RunPython(migrations.RunPython.noop, create_sqlite_triggers),
+        migrations.AddField(
+            model_name='article',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='faculty',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(create_sqlite_triggers, migrations.RunPython.noop),
+    ]
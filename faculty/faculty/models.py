@@ -3,6 +3,8 @@ from django_countries.fields import CountryField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django_prometheus.models import ExportModelOperationsMixin
 
+from faculty.geo import grid_cell
+
 
 # Create your models here.
 class Location(ExportModelOperationsMixin('location'), models.Model):
@@ -13,6 +15,13 @@ class Location(ExportModelOperationsMixin('location'), models.Model):
     )
     country = CountryField()
     address = models.CharField(max_length=250)
+    # Cell of the grid used to index the locations by position, updated on save
+    grid_cell = models.PositiveIntegerField(null=True, editable=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
 
 
 class Faculty(ExportModelOperationsMixin('faculty'), models.Model):
@@ -23,6 +32,7 @@ class Faculty(ExportModelOperationsMixin('faculty'), models.Model):
         on_delete=models.SET_NULL,
         null=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Article(ExportModelOperationsMixin('article'), models.Model):
@@ -32,3 +42,21 @@ class Article(ExportModelOperationsMixin('article'), models.Model):
     content = models.TextField()
     author = models.CharField(max_length=30)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['faculty', 'created_at', 'id'], name='article_faculty_created'),
+        ]
+
+
+class CacheVersion(ExportModelOperationsMixin('cacheversion'), models.Model):
+    key = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+
+class OutboxEvent(ExportModelOperationsMixin('outboxevent'), models.Model):
+    # Events are written in the transaction of the change they describe and published by the relay
+    topic = models.CharField(max_length=100)
+    payload = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ArticleCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the newest articles first, so the cost of a page does not depend
+    on how deep it is and articles inserted meanwhile do not shift the following pages.
+
+    The cursor holds the created_at of the last article and an offset among the articles
+    sharing it, only the first field of the ordering is a key. The id orders those articles
+    the same way on every page.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
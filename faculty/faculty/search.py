@@ -0,0 +1,71 @@
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# Articles are written in several languages, so words are indexed without stemming
+POSTGRESQL_CONFIG = 'simple'
+# BM25 with the weights of the title, author and content columns
+SQLITE_RANK = 'bm25(10.0, 5.0, 1.0)'
+
+
+def fts5_query(text):
+    """
+    Quotes every word of the text as a prefix, so FTS5 looks for all of them, also as the start
+    of longer words, and ignores its query syntax.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def tsquery(text):
+    """Same query for to_tsquery, every word quoted as a prefix and all of them required."""
+    return ' & '.join(f"'{word}':*" for word in re.findall(r'\w+', text))
+
+
+def search_articles(queryset, text):
+    """
+    Filters the articles whose title, author or content match the text and annotates
+    them with a rank, higher for better matches.
+
+    PostgreSQL uses the GIN indexed search_vector column and SQLite the FTS5
+    faculty_article_fts table, both kept up to date on write by database triggers.
+    """
+    if connection.vendor == 'postgresql':
+        # django.contrib.postgres imports psycopg2, which SQLite development setups go without
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        query = tsquery(text)
+        if not query:
+            return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+        search_query = SearchQuery(query, config=POSTGRESQL_CONFIG, search_type='raw')
+        # The column is added by the migration, a GIN indexed field on the model would break SQLite
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        vector = RawSQL(f'{table}.search_vector', [], output_field=SearchVectorField())
+        return queryset \
+            .alias(search_vector=vector) \
+            .filter(search_vector=search_query) \
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+
+    query = fts5_query(text)
+    if not query:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    # Matches are ranked once and materialized, the rank of an article is then found by rowid
+    return queryset \
+        .filter(id__in=RawSQL('SELECT rowid FROM faculty_article_fts WHERE faculty_article_fts MATCH %s', [query])) \
+        .annotate(rank=RawSQL(
+            'WITH matches AS MATERIALIZED (SELECT rowid, -rank AS rank FROM faculty_article_fts '
+            f"WHERE faculty_article_fts MATCH %s AND rank MATCH '{SQLITE_RANK}') "
+            'SELECT rank FROM matches WHERE rowid = faculty_article.id', [query],
+            output_field=FloatField()))
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """Ranked full-text search over the title, author and content of the articles."""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search_articles(queryset, text).order_by('-rank', '-created_at', '-id')
@@ -1,21 +1,50 @@
 from faculty.models import Faculty, Article, Location
 from rest_framework import serializers
+from django.db import transaction
+
+from faculty.geo import grid_cell
+
+EXCERPT_LENGTH = 200
 
 
 class LocationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Location
-        fields = '__all__'
+        exclude = ['grid_cell', 'updated_at']
         read_only = ['id']
 
 
+class FacultyBulkSerializer(serializers.ListSerializer):
+    MAX_FACULTIES = 10000
+
+    def __init__(self, *args, **kwargs):
+        # ListSerializer sets max_length from its arguments only
+        kwargs.setdefault('max_length', self.MAX_FACULTIES)
+        super().__init__(*args, **kwargs)
+
+    def create(self, validated_data):
+        # bulk_create skips Location.save, the grid cell is computed here
+        locations = [
+            Location(**data['location'], grid_cell=grid_cell(data['location']['latitude'],
+                                                             data['location']['longitude']))
+            for data in validated_data
+        ]
+        with transaction.atomic():
+            Location.objects.bulk_create(locations)
+            return Faculty.objects.bulk_create([
+                Faculty(**{key: value for key, value in data.items() if key != 'location'}, location=location)
+                for data, location in zip(validated_data, locations)
+            ])
+
+
 class FacultySerializer(serializers.ModelSerializer):
     location = LocationSerializer()
 
     class Meta:
         model = Faculty
-        fields = '__all__'
+        exclude = ['updated_at']
         read_only = ['id']
+        list_serializer_class = FacultyBulkSerializer
 
     def create(self, validated_data):
         location_data = validated_data.pop('location')
@@ -24,13 +53,63 @@ class FacultySerializer(serializers.ModelSerializer):
         return faculty
 
 
+class NearbyFacultySerializer(FacultySerializer):
+    distance = serializers.FloatField(read_only=True, help_text='Distance in kilometers')
+
+
+class NearbyParametersSerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90.0, max_value=90.0)
+    lon = serializers.FloatField(min_value=-180.0, max_value=180.0)
+    radius = serializers.FloatField(min_value=0.0, max_value=1000.0, default=10.0,
+                                    help_text='Radius in kilometers')
+
+
 class ArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
-        fields = '__all__'
+        exclude = ['updated_at']
         read_only = ['id', 'created_at']
 
 
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Looks up each related object once for the lifetime of the field."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.objects = {}
+
+    def to_internal_value(self, data):
+        key = str(data)
+        if key not in self.objects:
+            self.objects[key] = super().to_internal_value(data)
+        return self.objects[key]
+
+
+class ArticleImportSerializer(ArticleSerializer):
+    # Imported articles mostly belong to the same faculties, which are not fetched for every line
+    faculty = CachedPrimaryKeyRelatedField(queryset=Faculty.objects.all())
+
+
+class ArticleImportReportSerializer(serializers.Serializer):
+    imported = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+class ArticleSummarySerializer(serializers.ModelSerializer):
+    excerpt = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Article
+        exclude = ['content', 'updated_at']
+
+    def get_excerpt(self, article) -> str:
+        # The queryset only loads EXCERPT_LENGTH + 1 characters, enough to know if the content was cut
+        if len(article.excerpt) <= EXCERPT_LENGTH:
+            return article.excerpt
+        return article.excerpt[:EXCERPT_LENGTH].rsplit(' ', 1)[0].rstrip() + '…'
+
+
 class ErrorSerializer(serializers.Serializer):
     details = serializers.CharField()
 
@@ -43,3 +122,11 @@ class CertificateParametersSerializer(serializers.Serializer):
         'BACHELOR_DEGREE_CERTIFICATE'
     ]
     certificate_type = serializers.ChoiceField(choices=CERTIFICATE_TYPES)
+
+
+class CertificateBatchSerializer(serializers.Serializer):
+    student_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=10000)
+    certificate_type = serializers.ChoiceField(choices=CertificateParametersSerializer.CERTIFICATE_TYPES)
+
+    def validate_student_ids(self, value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,236 @@
+import io
+import json
+import math
+import os
+import re
+import signal
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from faculty.certificates import CertificateRenderer, CertificateStore
+from faculty.events import FileSink, publish_event
+from faculty.geo import EARTH_RADIUS_KM, GRID_COLUMNS, bounding_box_cells, grid_cell
+from faculty.models import Article, Faculty, OutboxEvent
+from faculty.stamping import VARIABLE_CONTENT, PdfTemplate
+from faculty.serializers import FacultyBulkSerializer
+
+
+class FacultyBulkCreateTests(TestCase):
+    faculty = {'name': 'Bulk', 'location': {'latitude': 1, 'longitude': 2, 'country': 'PT', 'address': 'a'}}
+
+    def test_creates_every_faculty(self):
+        response = self.client.post('/faculty/bulk/', [self.faculty] * 3, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Faculty.objects.count(), 3)
+
+    def test_rejects_more_faculties_than_the_limit(self):
+        faculties = [self.faculty] * (FacultyBulkSerializer.MAX_FACULTIES + 1)
+        response = self.client.post('/faculty/bulk/', faculties, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Faculty.objects.exists())
+
+
+
+class ValidatorFieldsTests(TestCase):
+    def test_updated_at_only_feeds_the_validators(self):
+        response = self.client.post('/faculty/', FacultyBulkCreateTests.faculty, content_type='application/json')
+        faculty = response.json()
+        Article.objects.create(faculty_id=faculty['id'], title='Title', author='someone', content='text')
+        response = self.client.get(f"/faculty/{faculty['id']}/")
+        self.assertTrue(response.has_header('ETag'))
+        self.assertNotIn('updated_at', response.json())
+        self.assertNotIn('updated_at', response.json()['location'])
+        articles = self.client.get('/articles/', {'faculty': faculty['id']}).json()['results']
+        self.assertNotIn('updated_at', articles[0])
+
+class ArticleSearchTests(TestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(name='Search')
+        for title in ('alpha beta', 'alphabet', 'gamma'):
+            Article.objects.create(faculty=self.faculty, title=title, author='someone', content='text')
+
+    def search(self, text):
+        response = self.client.get('/articles/', {'faculty': self.faculty.id, 'search': text})
+        self.assertEqual(response.status_code, 200)
+        return sorted(article['title'] for article in response.json()['results'])
+
+    def test_matches_the_start_of_words(self):
+        self.assertEqual(self.search('alp'), ['alpha beta', 'alphabet'])
+
+    def test_requires_every_word(self):
+        self.assertEqual(self.search('alp bet'), ['alpha beta'])
+
+    def test_rejects_cursor_pagination(self):
+        response = self.client.get('/articles/', {'faculty': self.faculty.id, 'search': 'alp', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ignores_query_syntax(self):
+        self.assertEqual(self.search('"gam* OR'), [])
+
+
+def covered_cells(cells):
+    """Numbers of the grid cells matched by a Q object of bounding_box_cells."""
+    numbers = set()
+    for child in cells.children:
+        if isinstance(child, Q):
+            numbers |= covered_cells(child)
+        else:
+            first, last = child[1]
+            numbers.update(range(first, last + 1))
+    return numbers
+
+
+def destination(latitude, longitude, bearing, distance):
+    """Point at the given distance, in kilometers, from a point in the direction of the bearing."""
+    phi, lambda_, theta = math.radians(latitude), math.radians(longitude), math.radians(bearing)
+    delta = distance / EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+    lambda2 = lambda_ + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi),
+                                   math.cos(delta) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lambda2) + 540) % 360 - 180
+
+
+class BoundingBoxCellsTests(SimpleTestCase):
+    def assertCoversCircle(self, latitude, longitude, radius):
+        cells = covered_cells(bounding_box_cells(latitude, longitude, radius))
+        for bearing in range(0, 360, 5):
+            for fraction in (0.25, 0.5, 0.75, 0.999):
+                point = destination(latitude, longitude, bearing, radius * fraction)
+                self.assertIn(grid_cell(*point), cells, point)
+        return cells
+
+    def test_small_circle_covers_only_nearby_cells(self):
+        cells = self.assertCoversCircle(41.15, -8.61, 10)
+        self.assertLessEqual(len(cells), 4)
+
+    def test_circle_crossing_the_antimeridian_eastwards(self):
+        cells = self.assertCoversCircle(-17.7, 179.9, 100)
+        self.assertIn(grid_cell(-17.7, -179.9), cells)
+        self.assertNotIn(grid_cell(-17.7, 0), cells)
+
+    def test_circle_crossing_the_antimeridian_westwards(self):
+        cells = self.assertCoversCircle(65.0, -179.8, 100)
+        self.assertIn(grid_cell(65.0, 179.8), cells)
+        self.assertNotIn(grid_cell(65.0, 0), cells)
+
+    def test_circle_containing_the_north_pole_spans_every_longitude(self):
+        cells = self.assertCoversCircle(89.5, 10, 200)
+        self.assertTrue({grid_cell(89.9, longitude) for longitude in range(-180, 180)} <= cells)
+        # Across the pole, on the opposite meridian
+        self.assertIn(grid_cell(89.0, -170), cells)
+
+    def test_circle_containing_the_south_pole_spans_every_longitude(self):
+        cells = self.assertCoversCircle(-89.8, -45, 100)
+        self.assertTrue(set(range(GRID_COLUMNS)) <= cells)
+        self.assertIn(grid_cell(-89.5, 135), cells)
+
+
+class PdfTemplateTests(SimpleTestCase):
+    template = PdfTemplate('Certificate (café)', [(200, 500, 'Static line')])
+
+    def assertValidCrossReferences(self, document):
+        start = int(re.search(rb'startxref\n(\d+)\n%%EOF\n$', document).group(1))
+        self.assertTrue(document[start:].startswith(b'xref\n0 %d\n' % (VARIABLE_CONTENT + 1)))
+        entries = re.findall(rb'(\d{10}) 00000 n \n', document[start:])
+        self.assertEqual(len(entries), VARIABLE_CONTENT)
+        for number, offset in enumerate(entries, start=1):
+            self.assertTrue(document[int(offset):].startswith(b'%d 0 obj\n' % number), number)
+
+    def test_cross_references_point_to_every_object(self):
+        self.assertValidCrossReferences(self.template.stamp([(200, 480, 'Student id: 1')]))
+
+    def test_cross_references_follow_the_length_of_the_variable_text(self):
+        short = self.template.stamp([])
+        long = self.template.stamp([(200, 480, 'Zoë (ação) \\ ' * 20), (200, 460, 'Type: DEGREE')])
+        self.assertGreater(len(long), len(short))
+        self.assertValidCrossReferences(short)
+        self.assertValidCrossReferences(long)
+
+    def test_stream_lengths_match_their_content(self):
+        document = self.template.stamp([(200, 480, 'Zoë (ação)')])
+        for length, content in re.findall(rb'<< /Length (\d+) >>\nstream\n(.*?)\nendstream', document, re.DOTALL):
+            self.assertEqual(int(length), len(content))
+
+
+class CertificateRendererTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.renderer = CertificateRenderer(CertificateStore(directory.name, 1024 * 1024), workers=1)
+        self.addCleanup(lambda: self.renderer.pool and self.renderer.pool.shutdown())
+
+    def kill_pool_processes(self):
+        for process in list(self.renderer.pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+    def test_renders_and_stores_a_certificate(self):
+        with open(self.renderer.get(1, 'DEGREE'), 'rb') as file:
+            self.assertTrue(file.read().startswith(b'%PDF-'))
+        self.assertEqual(self.renderer.get(1, 'DEGREE'), self.renderer.get(1, 'DEGREE'))
+
+    def test_replaces_the_pool_when_a_process_died(self):
+        self.renderer.get(1, 'DEGREE')
+        broken = self.renderer.pool
+        self.kill_pool_processes()
+        self.assertTrue(os.path.exists(self.renderer.get(2, 'DEGREE')))
+        self.assertIsNot(self.renderer.pool, broken)
+        self.assertTrue(os.path.exists(self.renderer.get(3, 'DEGREE')))
+
+
+class FailingSink(FileSink):
+    """File sink failing to deliver the given events once, while the following ones are acknowledged."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = set(failures)
+
+    def send(self, events):
+        failed = {event.pk for event in events} & self.failures
+        self.failures -= failed
+        return super().send([event for event in events if event.pk not in failed])
+
+
+class RelayEventsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'events.jsonl')
+        settings = override_settings(EVENT_SINK='file', EVENT_FILE_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.events = [publish_event('faculty', {'number': number}) for number in range(5)]
+
+    def relay(self, sink=None, *args):
+        with mock.patch('faculty.management.commands.relay_events.get_sink', return_value=sink or FileSink()):
+            call_command('relay_events', '--once', '--interval', '0', *args, stdout=io.StringIO())
+
+    def published(self):
+        with open(self.path) as file:
+            return [json.loads(line)['payload']['number'] for line in file]
+
+    def test_publishes_and_deletes_every_event(self):
+        self.relay(None, '--batch-size', '2')
+        self.assertEqual(self.published(), [0, 1, 2, 3, 4])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_events_after_a_failed_one_are_sent_again_after_it(self):
+        sink = FailingSink([self.events[2].pk])
+        with mock.patch.object(sink, 'send', wraps=sink.send) as send:
+            self.relay(sink)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual([event.pk for event in send.call_args_list[1].args[0]],
+                         [event.pk for event in self.events[2:]])
+        # 3 and 4 were acknowledged along with the failure of 2, they are sent again after it
+        self.assertEqual(self.published(), [0, 1, 3, 4, 2, 3, 4])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_once_fails_when_no_event_can_be_delivered(self):
+        sink = mock.Mock(send=mock.Mock(return_value=set()))
+        with self.assertRaises(CommandError):
+            self.relay(sink)
+        self.assertEqual(OutboxEvent.objects.count(), 5)
@@ -1,53 +1,72 @@
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 from rest_framework import generics, mixins, status
-from django.http import Http404, FileResponse
+from django.http import Http404, FileResponse, StreamingHttpResponse
 from rest_framework.response import Response
-from rest_framework import filters
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models.functions import Substr
 
 from faculty.models import Faculty, Article
-from faculty.serializers import FacultySerializer, ArticleSerializer, ErrorSerializer, CertificateParametersSerializer
-from sentry_sdk import capture_exception
-from reportlab.pdfgen import canvas
+from faculty.serializers import FacultySerializer, ArticleSerializer, ErrorSerializer, CertificateParametersSerializer, \
+    ArticleSummarySerializer, EXCERPT_LENGTH, NearbyFacultySerializer, NearbyParametersSerializer, \
+    CertificateBatchSerializer, ArticleImportReportSerializer
+from faculty.search import FullTextSearchFilter
+from faculty.pagination import ArticleCursorPagination
+from faculty.geo import bounding_box_cells, haversine
+from faculty.caching import cached_response, bump_versions, DIRECTORY_KEY, articles_key
+from faculty.importing import import_articles, parse_ndjson, read_lines
+from faculty.conditional import conditional_response, row_validators, aggregate_validators
+from faculty.events import publish_event, TOPIC_FACULTY
+from faculty.certificates import renderer, stream_certificates_zip
 from rest_framework.views import APIView
-
-import io
-from confluent_kafka import Producer
-import json
-
-kafka_conf = {
-    'bootstrap.servers': '107.23.7.83:9092',
-}
-TOPIC_FACULTY = 'faculty'
-
-kafka_producer = Producer(**kafka_conf)
-
-
-def kafka_delivery_callback(err, msg):
-    if err:
-        print('%% Message failed delivery: %s\n' % err)
-    else:
-        print('%% Message delivered to %s [%d]\n' %
-              (msg.topic(), msg.partition()))
-
-
-def kafka_send_event(topic: str, event: str):
-    try:
-        kafka_producer.produce(topic, event, callback=kafka_delivery_callback)
-    except BufferError as e:
-        capture_exception(e)
-        print(
-            '%% Local producer queue is full (%d messages awaiting delivery): try again\n'
-            % len(kafka_producer))
+from django.db import transaction
 
 
 # Create your views here.
 class FacultyListView(generics.GenericAPIView, mixins.ListModelMixin):
-    queryset = Faculty.objects.all()
+    queryset = Faculty.objects.select_related('location')
     serializer_class = FacultySerializer
 
+    @extend_schema(description="Retrieves the faculties. Supports conditional requests through the ETag header")
     def get(self, request, *args, **kwargs):
-        return self.list(request, *args, **kwargs)
+        validators = aggregate_validators(Faculty.objects.all(), 'updated_at', 'location__updated_at')
+        return conditional_response(request, validators, lambda: cached_response(
+            request, 'faculty_list', [DIRECTORY_KEY], lambda: self.list(request, *args, **kwargs)))
+
+
+class FacultyNearbyListView(generics.GenericAPIView):
+    queryset = Faculty.objects.filter(is_active=True).select_related('location')
+    serializer_class = NearbyFacultySerializer
+
+    @extend_schema(
+        description="Retrieves the active faculties located within the radius, in kilometers, "
+                    "of the given point, closest first",
+        parameters=[
+            OpenApiParameter(name="lat", required=True, type=float),
+            OpenApiParameter(name="lon", required=True, type=float),
+            OpenApiParameter(name="radius", required=False, type=float),
+        ],
+        responses={200: NearbyFacultySerializer(many=True), 400: ErrorSerializer},
+    )
+    def get(self, request, *args, **kwargs):
+        parameters = NearbyParametersSerializer(data=request.query_params)
+        if not parameters.is_valid():
+            return Response(parameters.errors, status=status.HTTP_400_BAD_REQUEST)
+        latitude, longitude, radius = (parameters.validated_data[name] for name in ('lat', 'lon', 'radius'))
+
+        # The grid cells of the bounding box select the candidates, the exact distance selects the faculties
+        candidates = self.get_queryset().filter(
+            bounding_box_cells(latitude, longitude, radius, field='location__grid_cell'))
+        faculties = []
+        for faculty in candidates:
+            faculty.distance = haversine(latitude, longitude, faculty.location.latitude, faculty.location.longitude)
+            if faculty.distance <= radius:
+                faculties.append(faculty)
+        faculties.sort(key=lambda faculty: faculty.distance)
+
+        page = self.paginate_queryset(faculties)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(faculties, many=True).data)
 
 
 class FacultyDetailsView(
@@ -55,11 +74,15 @@ class FacultyDetailsView(
     mixins.DestroyModelMixin,
     mixins.RetrieveModelMixin,
 ):
-    queryset = Faculty.objects.all()
+    queryset = Faculty.objects.select_related('location')
     serializer_class = FacultySerializer
 
+    @extend_schema(description="Retrieves a faculty. Supports conditional requests through the "
+                               "ETag and Last-Modified headers")
     def get(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        validators = row_validators(Faculty.objects.all(), kwargs['pk'], 'updated_at', 'location__updated_at')
+        return conditional_response(request, validators, lambda: cached_response(
+            request, 'faculty_details', [DIRECTORY_KEY], lambda: self.retrieve(request, *args, **kwargs)))
 
     @extend_schema(request=None,
                    examples=[
@@ -95,11 +118,11 @@ class FacultyDetailsView(
                     'details': 'Faculty already archived.',
                 },
                     status=status.HTTP_400_BAD_REQUEST)
-            faculty.is_active = False
-            faculty.save()
-
-            message = json.dumps({'archived': faculty.pk})
-            kafka_send_event(TOPIC_FACULTY, message)
+            with transaction.atomic():
+                faculty.is_active = False
+                faculty.save()
+                publish_event(TOPIC_FACULTY, {'archived': faculty.pk})
+            bump_versions([DIRECTORY_KEY, articles_key(faculty.pk)])
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         except Faculty.DoesNotExist:
@@ -113,18 +136,37 @@ class FacultyCreateView(generics.GenericAPIView, mixins.CreateModelMixin):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        faculty = serializer.save()
+        with transaction.atomic():
+            faculty = serializer.save()
+            publish_event(TOPIC_FACULTY, {'created': faculty.pk})
+        bump_versions([DIRECTORY_KEY])
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data,
                         status=status.HTTP_201_CREATED,
-                        headers=headers), faculty
+                        headers=headers)
 
     def post(self, request, *args, **kwargs):
-        response, faculty = self.create(request, *args, **kwargs)
+        return self.create(request, *args, **kwargs)
 
-        message = json.dumps({'created': faculty.pk})
-        kafka_send_event(TOPIC_FACULTY, message)
-        return response
+
+class FacultyBulkCreateView(generics.GenericAPIView):
+    queryset = Faculty.objects.all()
+    serializer_class = FacultySerializer
+
+    @extend_schema(
+        request=FacultySerializer(many=True),
+        description="Creates many faculties in a single transaction, either all of them or none "
+                    "when one is invalid. A single created event lists the new faculties",
+        responses={201: FacultySerializer(many=True)},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            faculties = serializer.save()
+            publish_event(TOPIC_FACULTY, {'created': [faculty.pk for faculty in faculties]})
+        bump_versions([DIRECTORY_KEY])
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class ArticleListView(generics.GenericAPIView, mixins.ListModelMixin):
@@ -134,12 +176,43 @@ class ArticleListView(generics.GenericAPIView, mixins.ListModelMixin):
         'faculty': ['exact'],
         'created_at': ['gte', 'lte'],
     }
-    search_fields = ['author', 'title']
-    filter_backends = (filters.SearchFilter, DjangoFilterBackend)
+    filter_backends = (FullTextSearchFilter, DjangoFilterBackend)
+
+    def is_summary(self):
+        return self.request.query_params.get('summary') == 'true'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_summary():
+            # The content is never loaded, only its first characters are read by the database
+            queryset = queryset.defer('content').annotate(excerpt=Substr('content', 1, EXCERPT_LENGTH + 1))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return ArticleSummarySerializer
+        return ArticleSerializer
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = ArticleCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     @extend_schema(
+        description="Retrieves the articles of a faculty. With pagination=cursor the newest articles come first, "
+                    "paginated with an opaque cursor, which can not be combined with a search, ordered by relevance. "
+                    "The full content of an article is available on its details. "
+                    "Supports conditional requests through the ETag header",
         parameters=[
             OpenApiParameter(name="faculty", required=True, type=int),
+            OpenApiParameter(name="pagination", required=False, enum=['cursor']),
+            OpenApiParameter(name="cursor", required=False, type=str),
+            OpenApiParameter(name="summary", required=False, type=bool,
+                             description="Returns an excerpt of the content instead of the full content"),
         ],
     )
     def get(self, request, *args, **kwargs):
@@ -147,7 +220,19 @@ class ArticleListView(generics.GenericAPIView, mixins.ListModelMixin):
             return Response({
                 'details': 'A faculty is needed to filter the Articles',
             }, status=status.HTTP_400_BAD_REQUEST)
-        return self.list(request, *args, **kwargs)
+        if request.query_params.get('pagination') == 'cursor' and request.query_params.get('search', '').strip():
+            # The cursor follows the creation order, which would throw away the ranking of the search
+            return Response({
+                'details': 'The search results are ordered by relevance and can not be paginated with a cursor',
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            faculty_id = int(request.query_params['faculty'])
+        except ValueError:
+            # Not cached, the filter reports the invalid faculty
+            return self.list(request, *args, **kwargs)
+        # The pages of a faculty are invalidated by the writes on its articles
+        return cached_response(request, 'article_list', [articles_key(faculty_id)],
+                               lambda: self.list(request, *args, **kwargs), etag=True)
 
 
 class ArticleDetailsView(
@@ -158,8 +243,15 @@ class ArticleDetailsView(
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_versions([articles_key(instance.faculty_id)])
+
+    @extend_schema(description="Retrieves an article. Supports conditional requests through the "
+                               "ETag and Last-Modified headers")
     def get(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        validators = row_validators(Article.objects.all(), kwargs['pk'], 'updated_at')
+        return conditional_response(request, validators, lambda: self.retrieve(request, *args, **kwargs))
 
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
@@ -169,10 +261,52 @@ class ArticleCreateView(generics.GenericAPIView, mixins.CreateModelMixin):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
 
+    def perform_create(self, serializer):
+        article = serializer.save()
+        bump_versions([articles_key(article.faculty_id)])
+
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
 
 
+class ArticleImportView(APIView):
+
+    @extend_schema(
+        request={'application/x-ndjson': str},
+        description="Imports articles from a NDJSON body with one article per line. The body is validated "
+                    "and inserted in batches as it is read, invalid lines are reported and skipped",
+        examples=[
+            OpenApiExample(
+                name="Import Report",
+                description="Import Report",
+                response_only=True,
+                status_codes=[200],
+                value={
+                    'imported': 499,
+                    'rejected': 1,
+                    'errors': [{'line': 3, 'details': {'faculty': ['This field is required.']}}],
+                },
+            ),
+        ],
+        responses={200: ArticleImportReportSerializer, 400: ErrorSerializer, 415: ErrorSerializer})
+    def post(self, request, format=None):
+        if request.content_type.split(';')[0].strip() != 'application/x-ndjson':
+            return Response({
+                'details': 'The body must be application/x-ndjson',
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # The body is read line by line instead of being parsed into request.data
+        lines = read_lines(request.stream) if request.stream else iter(())
+        try:
+            imported, rejected, errors = import_articles(parse_ndjson(lines))
+        except UnicodeDecodeError:
+            return Response({
+                'details': 'The body must be encoded in UTF-8',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'imported': imported, 'rejected': rejected, 'errors': errors}, status=status.HTTP_200_OK)
+
+
 class CertificateCreateView(APIView):
 
     @extend_schema(request=None,
@@ -184,18 +318,29 @@ class CertificateCreateView(APIView):
     def get(self, request, format=None):
         serializer = CertificateParametersSerializer(data=request.query_params)
         if serializer.is_valid():
-            buffer = io.BytesIO()
+            file = renderer.open(serializer.validated_data['student_id'],
+                                 serializer.validated_data['certificate_type'])
+            return FileResponse(file, as_attachment=True, filename="certificate.pdf")
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            pdf = canvas.Canvas(buffer)
 
-            pdf.setTitle("Certificate")
-            pdf.drawString(200, 500, "This is an excellent certificate.")
-            pdf.drawString(200, 480, f"Student id: {serializer.validated_data.get('student_id')}")
-            pdf.drawString(200, 460, f"Certificate type: {serializer.validated_data.get('certificate_type')}")
-            pdf.showPage()
-            pdf.save()
+class CertificateBatchView(APIView):
 
-            buffer.seek(0)
-            return FileResponse(buffer, as_attachment=True, filename="certificate.pdf")
+    @extend_schema(
+        description="Streams a ZIP archive with the certificates of the given students, "
+                    "the certificates are rendered in parallel while the archive is sent",
+        request=CertificateBatchSerializer,
+        responses={(200, 'application/zip'): bytes, 400: ErrorSerializer},
+    )
+    def post(self, request, format=None):
+        serializer = CertificateBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            response = StreamingHttpResponse(
+                stream_certificates_zip(serializer.validated_data['student_ids'],
+                                        serializer.validated_data['certificate_type']),
+                content_type='application/zip')
+            response['Content-Disposition'] = 'attachment; filename="certificates.zip"'
+            return response
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
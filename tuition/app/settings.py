@@ -165,6 +165,14 @@ REST_FRAMEWORK = {
     }
 }
 
+# Degree gateway, the tuitions are cached for DEGREE_TUITION_TTL seconds and served while refreshed
+# in the background until DEGREE_TUITION_STALE_TTL, unknown degrees for DEGREE_TUITION_NOT_FOUND_TTL
+DEGREE_GATEWAY_URL = os.getenv("DEGREE_GATEWAY_URL", "https://cosn-gateway.brenosalles.workers.dev")
+DEGREE_GATEWAY_TIMEOUT = float(os.getenv("DEGREE_GATEWAY_TIMEOUT", "3"))
+DEGREE_TUITION_TTL = int(os.getenv("DEGREE_TUITION_TTL", str(60 * 60)))
+DEGREE_TUITION_STALE_TTL = int(os.getenv("DEGREE_TUITION_STALE_TTL", str(7 * 24 * 60 * 60)))
+DEGREE_TUITION_NOT_FOUND_TTL = int(os.getenv("DEGREE_TUITION_NOT_FOUND_TTL", str(5 * 60)))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Tuition Fee Service',
     'VERSION': '1.0.0',
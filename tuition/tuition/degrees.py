@@ -0,0 +1,126 @@
+import decimal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from sentry_sdk import capture_exception
+
+
+class DegreeUnavailable(Exception):
+    """The tuition of the degree is neither cached nor obtainable from the gateway."""
+
+
+class Entry:
+    def __init__(self, tuition):
+        # None when the gateway does not know the degree
+        self.tuition = tuition
+        self.fetched_at = time.monotonic()
+        self.refreshing = False
+
+    def age(self):
+        return time.monotonic() - self.fetched_at
+
+
+class DegreeTuitionCache:
+    """
+    Tuition of the degrees, fetched from the degree gateway with a pooled session.
+
+    A tuition is fresh for ttl seconds. Until stale_ttl seconds it is still served while a
+    background refresh fetches it again, and past that it is fetched before answering. When
+    the gateway fails, the last known tuition is served whatever its age. Unknown degrees are
+    remembered for not_found_ttl seconds. Concurrent lookups of a missing degree wait for a
+    single request to the gateway.
+    """
+
+    def __init__(self, url, timeout, ttl, stale_ttl, not_found_ttl):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.not_found_ttl = not_found_ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.fetch_locks = {}
+        self.refresher = ThreadPoolExecutor(max_workers=2)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, degree_id):
+        response = self.session.get(f'{self.url}/degrees/{degree_id}', timeout=self.timeout)
+        if response.status_code == 404:
+            return Entry(None)
+        response.raise_for_status()
+        try:
+            return Entry(decimal.Decimal(response.json()['tuition']))
+        except (ValueError, KeyError, TypeError, decimal.InvalidOperation) as error:
+            raise DegreeUnavailable(f'Invalid tuition for degree {degree_id}') from error
+
+    def refresh(self, degree_id, entry):
+        try:
+            fresh = self.fetch(degree_id)
+        except Exception as error:
+            capture_exception(error)
+            entry.refreshing = False
+            return
+        with self.lock:
+            self.entries[degree_id] = fresh
+
+    def usable(self, entry):
+        if entry.tuition is None:
+            return entry.age() < self.not_found_ttl
+        return entry.age() < self.stale_ttl
+
+    def get(self, degree_id, fetch=True):
+        """
+        Returns the tuition of the degree, or None when the gateway does not know it.
+        With fetch False, as when the gateway is known to be down, only cached values are used.
+        Raises DegreeUnavailable when the tuition can not be obtained.
+        """
+        with self.lock:
+            entry = self.entries.get(degree_id)
+            if entry is not None and self.usable(entry):
+                if fetch and entry.tuition is not None and entry.age() >= self.ttl and not entry.refreshing:
+                    entry.refreshing = True
+                    self.refresher.submit(self.refresh, degree_id, entry)
+                return entry.tuition
+            fetch_lock = self.fetch_locks.setdefault(degree_id, threading.Lock())
+
+        if not fetch:
+            return self.last_known(entry)
+
+        with fetch_lock:
+            with self.lock:
+                current = self.entries.get(degree_id)
+            if current is not entry and current is not None and self.usable(current):
+                # Fetched by another request meanwhile
+                return current.tuition
+            try:
+                fresh = self.fetch(degree_id)
+            except Exception as error:
+                capture_exception(error)
+                return self.last_known(entry, error)
+            with self.lock:
+                self.entries[degree_id] = fresh
+                self.fetch_locks.pop(degree_id, None)
+            return fresh.tuition
+
+    @staticmethod
+    def last_known(entry, error=None):
+        if entry is not None and entry.tuition is not None:
+            return entry.tuition
+        raise DegreeUnavailable('Tuition value of the degree is not available') from error
+
+
+degree_tuitions = DegreeTuitionCache(
+    settings.DEGREE_GATEWAY_URL,
+    settings.DEGREE_GATEWAY_TIMEOUT,
+    settings.DEGREE_TUITION_TTL,
+    settings.DEGREE_TUITION_STALE_TTL,
+    settings.DEGREE_TUITION_NOT_FOUND_TTL,
+)
@@ -0,0 +1,80 @@
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+DEGREE_PATH = re.compile(r'^/degrees/(?P<degree_id>[0-9a-fA-F-]+)$')
+
+
+class StubDegreeHandler(BaseHTTPRequestHandler):
+    # Keeps the connections alive, as the gateway does
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        gateway = self.server
+        gateway.requests_served += 1
+        time.sleep(gateway.delay)
+        match = DEGREE_PATH.match(self.path)
+        if gateway.status is not None or match is None or match['degree_id'] in gateway.unknown:
+            self.send_response(gateway.status or 404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'id': match['degree_id'], 'tuition': gateway.tuition}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.log is not None:
+            self.server.log(f'[{self.server.requests_served}] {format % args}')
+
+
+class StubDegreeGateway(ThreadingHTTPServer):
+    """
+    Local stand-in of the degree gateway, every degree has the given tuition except the unknown
+    ones. When status is set every request is answered with it, as a failing gateway would.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, tuition='2500.00', unknown=(), delay=0.0, log=None):
+        super().__init__(('127.0.0.1', port), StubDegreeHandler)
+        self.tuition = tuition
+        self.unknown = set(unknown)
+        self.delay = delay
+        self.log = log
+        self.status = None
+        self.requests_served = 0
+        self.connections = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class Command(BaseCommand):
+    help = 'Serves a local stand-in of the degree gateway, every degree has the given tuition except ' \
+           'the unknown ones. Run the service with DEGREE_GATEWAY_URL=http://localhost:<port> to use it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8090)
+        parser.add_argument('--tuition', default='2500.00')
+        parser.add_argument('--unknown', action='append', default=[], help='Degree answered with 404')
+        parser.add_argument('--delay', type=float, default=0.0, help='Seconds waited before answering')
+
+    def handle(self, *args, **options):
+        server = StubDegreeGateway(options['port'], options['tuition'], options['unknown'], options['delay'],
+                                   log=self.stdout.write)
+        self.stdout.write(f'Degree gateway stub listening on {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
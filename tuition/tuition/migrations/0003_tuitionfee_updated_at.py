@@ -0,0 +1,18 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuition', '0002_alter_tuitionfee_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tuitionfee',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
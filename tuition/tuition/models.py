@@ -13,3 +13,4 @@ class TuitionFee(ExportModelOperationsMixin('tuitionfee'), models.Model):
         validators=[MinValueValidator(1.0)], decimal_places=2, max_digits=6)
     deadline = models.DateField()
     is_paid = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
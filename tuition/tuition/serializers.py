@@ -7,7 +7,7 @@ from rest_framework import serializers
 class TuitionFeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = TuitionFee
-        fields = '__all__'
+        exclude = ['updated_at']
         read_only = ['id']
 
 
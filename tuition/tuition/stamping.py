@@ -0,0 +1,71 @@
+from reportlab.lib.pagesizes import A4
+
+FONT_SIZE = 12
+
+# Objects of the template, the variable text is appended as the last object of each document
+CATALOG, PAGES, PAGE, FONT, STATIC_CONTENT, INFO, VARIABLE_CONTENT = range(1, 8)
+
+
+def pdf_string(text):
+    """Literal string in the WinAnsi encoding of the standard fonts."""
+    escaped = bytearray(b'(')
+    for byte in text.encode('cp1252', errors='replace'):
+        if byte in b'\\()':
+            escaped += b'\\' + bytes([byte])
+        elif byte < 32 or byte > 126:
+            escaped += b'\\%03o' % byte
+        else:
+            escaped.append(byte)
+    return bytes(escaped + b')')
+
+
+def text_stream(lines):
+    return b'\n'.join(
+        b'BT /F1 %d Tf 1 0 0 1 %g %g Tm %s Tj ET' % (FONT_SIZE, x, y, pdf_string(text))
+        for x, y, text in lines
+    )
+
+
+def stream_object(content):
+    return b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content)
+
+
+class PdfTemplate:
+    """
+    Single page PDF whose static part is serialized once. Stamping a document only writes
+    the variable lines, the cross-reference table and the trailer after the static bytes.
+    """
+
+    def __init__(self, title, static_lines=()):
+        width, height = A4
+        objects = {
+            CATALOG: b'<< /Type /Catalog /Pages %d 0 R >>' % PAGES,
+            PAGES: b'<< /Type /Pages /Kids [%d 0 R] /Count 1 >>' % PAGE,
+            PAGE: b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %g %g] /Resources << /Font << /F1 %d 0 R >> >> '
+                  b'/Contents [%d 0 R %d 0 R] >>' % (PAGES, width, height, FONT, STATIC_CONTENT, VARIABLE_CONTENT),
+            FONT: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            STATIC_CONTENT: stream_object(text_stream(static_lines)),
+            INFO: b'<< /Title %s >>' % pdf_string(title),
+        }
+
+        prefix = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self.offsets = []
+        for number in sorted(objects):
+            self.offsets.append(len(prefix))
+            prefix += b'%d 0 obj\n%s\nendobj\n' % (number, objects[number])
+        self.prefix = bytes(prefix)
+        self.xref = b''.join(b'%010d 00000 n \n' % offset for offset in self.offsets)
+
+    def stamp(self, lines):
+        """Returns the document with the given (x, y, text) lines drawn over the static page."""
+        variable = b'%d 0 obj\n%s\nendobj\n' % (VARIABLE_CONTENT, stream_object(text_stream(lines)))
+        xref_offset = len(self.prefix) + len(variable)
+        return b''.join((
+            self.prefix,
+            variable,
+            b'xref\n0 %d\n0000000000 65535 f \n' % (VARIABLE_CONTENT + 1),
+            self.xref,
+            b'%010d 00000 n \n' % len(self.prefix),
+            b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (VARIABLE_CONTENT + 1, CATALOG, INFO, xref_offset),
+        ))
@@ -0,0 +1,78 @@
+import decimal
+import threading
+import time
+import uuid
+
+from django.test import SimpleTestCase
+
+from tuition.degrees import DegreeTuitionCache, DegreeUnavailable
+from tuition.management.commands.stub_degree_gateway import StubDegreeGateway
+
+
+class DegreeTuitionCacheTests(SimpleTestCase):
+    degree_id = uuid.UUID('5f2b8d4e-0000-4000-8000-000000000001')
+
+    def setUp(self):
+        self.gateway = StubDegreeGateway()
+        threading.Thread(target=self.gateway.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True).start()
+        self.addCleanup(self.gateway.server_close)
+        self.addCleanup(self.gateway.shutdown)
+
+    def tuitions(self, ttl=60, stale_ttl=600, not_found_ttl=60):
+        tuitions = DegreeTuitionCache(self.gateway.url, timeout=2, ttl=ttl, stale_ttl=stale_ttl,
+                                      not_found_ttl=not_found_ttl)
+        self.addCleanup(tuitions.session.close)
+        self.addCleanup(tuitions.refresher.shutdown)
+        return tuitions
+
+    def test_fresh_tuitions_are_served_from_the_cache(self):
+        tuitions = self.tuitions()
+        self.assertEqual(tuitions.get(self.degree_id), decimal.Decimal('2500.00'))
+        self.gateway.tuition = '3000.00'
+        self.assertEqual(tuitions.get(self.degree_id), decimal.Decimal('2500.00'))
+        self.assertEqual(self.gateway.requests_served, 1)
+
+    def test_stale_tuitions_are_served_while_refreshed(self):
+        tuitions = self.tuitions(ttl=0)
+        tuitions.get(self.degree_id)
+        self.gateway.tuition = '3000.00'
+        self.assertEqual(tuitions.get(self.degree_id), decimal.Decimal('2500.00'))
+
+        deadline = time.monotonic() + 5
+        while tuitions.get(self.degree_id) != decimal.Decimal('3000.00'):
+            self.assertLess(time.monotonic(), deadline, 'The tuition was never refreshed')
+            time.sleep(0.01)
+
+    def test_unknown_degrees_are_remembered(self):
+        self.gateway.unknown.add(str(self.degree_id))
+        tuitions = self.tuitions()
+        self.assertIsNone(tuitions.get(self.degree_id))
+        self.assertIsNone(tuitions.get(self.degree_id))
+        self.assertEqual(self.gateway.requests_served, 1)
+
+    def test_unknown_degrees_are_asked_again_once_expired(self):
+        self.gateway.unknown.add(str(self.degree_id))
+        tuitions = self.tuitions(not_found_ttl=0)
+        tuitions.get(self.degree_id)
+        self.gateway.unknown.clear()
+        self.assertEqual(tuitions.get(self.degree_id), decimal.Decimal('2500.00'))
+        self.assertEqual(self.gateway.requests_served, 2)
+
+    def test_last_known_tuition_is_served_when_the_gateway_fails(self):
+        tuitions = self.tuitions(ttl=0, stale_ttl=0)
+        tuitions.get(self.degree_id)
+        self.gateway.status = 503
+        self.assertEqual(tuitions.get(self.degree_id), decimal.Decimal('2500.00'))
+        self.assertEqual(self.gateway.requests_served, 2)
+
+    def test_unavailable_without_a_known_tuition(self):
+        self.gateway.status = 503
+        with self.assertRaises(DegreeUnavailable):
+            self.tuitions().get(self.degree_id)
+
+    def test_requests_reuse_the_pooled_connection(self):
+        tuitions = self.tuitions()
+        for _ in range(5):
+            tuitions.get(uuid.uuid4())
+        self.assertEqual(self.gateway.requests_served, 5)
+        self.assertEqual(self.gateway.connections, 1)
@@ -1,5 +1,4 @@
 import io
-import requests
 from django.http import Http404, FileResponse
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 from rest_framework import generics, mixins, status
@@ -7,18 +6,21 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from dateutil.relativedelta import relativedelta
 import datetime
-from sentry_sdk import capture_exception
-from reportlab.pdfgen import canvas
-import decimal
 
 from tuition.models import TuitionFee
 from tuition.serializers import TuitionFeeSerializer, CreateTuitionFeeSerializer, ErrorSerializer
+from tuition.stamping import PdfTemplate
+from tuition.degrees import degree_tuitions, DegreeUnavailable
+from tuition.conditional import conditional_response, row_validators, aggregate_validators
 
 NUMBER_FAILURES = 10
 end_of_timeout = None
 failures_current_5_minutes = 0
 last_date_changed = datetime.datetime.now()
 
+# Every line of the receipt is variable, only the document structure is built once
+RECEIPT_TEMPLATE = PdfTemplate("Receipt")
+
 
 # Create your views here.
 class TuitionFeeListView(generics.GenericAPIView,
@@ -32,6 +34,7 @@ class TuitionFeeListView(generics.GenericAPIView,
     }
 
     @extend_schema(
+        description="Retrieves the tuition fees of a student. Supports conditional requests through the ETag header",
         parameters=[
             OpenApiParameter(name="student_id", required=True, type=int),
         ],
@@ -42,7 +45,8 @@ class TuitionFeeListView(generics.GenericAPIView,
                 'details': 'A student_id is needed to filter the TuitionFees',
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        return self.list(request, *args, **kwargs)
+        validators = aggregate_validators(self.filter_queryset(TuitionFee.objects.all()), 'updated_at')
+        return conditional_response(request, validators, lambda: self.list(request, *args, **kwargs))
 
 
 class TuitionFeeDetailsView(generics.GenericAPIView,
@@ -51,8 +55,11 @@ class TuitionFeeDetailsView(generics.GenericAPIView,
     queryset = TuitionFee.objects.all()
     serializer_class = TuitionFeeSerializer
 
+    @extend_schema(description="Retrieves a tuition fee. Supports conditional requests through the "
+                               "ETag and Last-Modified headers")
     def get(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        validators = row_validators(TuitionFee.objects.all(), kwargs['pk'], 'updated_at')
+        return conditional_response(request, validators, lambda: self.retrieve(request, *args, **kwargs))
 
 
 def last_day_of_month(now):
@@ -132,63 +139,48 @@ class TuitionFeeCreateView(APIView):
         serializer = CreateTuitionFeeSerializer(data=request.data)
         if serializer.is_valid():
             global end_of_timeout
-            if end_of_timeout:
-                if datetime.datetime.now() < end_of_timeout:
-                    return Response({'details': 'Tuition value of the degree is not available'},
-                                    status=status.HTTP_503_SERVICE_UNAVAILABLE)
-                else:
-                    end_of_timeout = None
-
-            url = f"https://cosn-gateway.brenosalles.workers.dev/degrees/{serializer.validated_data.get('degree_id')}"
-            response = None
+            if end_of_timeout and datetime.datetime.now() >= end_of_timeout:
+                end_of_timeout = None
+
             try:
-                response = requests.get(url, timeout=3)
-                response.raise_for_status()
-            except Exception as e:
-                capture_exception(e)
-
-            if response and response.status_code == 200:
-                data = response.json()
-                if 'tuition' in data:
-                    try:
-                        value = decimal.Decimal(data['tuition'])
-                        now = last_day_of_month(datetime.datetime.now().date())
-                        tuition_fees = []
-                        range_limit = 1
-
-                        if serializer.validated_data.get('payment_type') == "MONTHLY":
-                            range_limit = 10
-
-                        new_value = value / range_limit
-
-                        for i in range(range_limit):
-                            new_deadline = now + relativedelta(months=+i)
-                            new_deadline = last_day_of_month(new_deadline)
-                            tuition_object = TuitionFee.objects.create(degree_id=serializer.validated_data.get('degree_id'),
-                                                                       student_id=serializer.validated_data.get(
-                                'student_id'), amount=new_value,
-                                deadline=new_deadline)
-                            tuition_object.save()
-                            tuition_fees.append(tuition_object)
-
-                        tuition_fee_serializer = TuitionFeeSerializer(
-                            tuition_fees, many=True)
-                        return Response(tuition_fee_serializer.data, status=status.HTTP_201_CREATED)
-                    except ValueError as e:
-                        capture_exception(e)
-            elif response and response.status_code == 404:
-                pass
-            else:
-                global last_date_changed
-                global failures_current_5_minutes
-                if (datetime.datetime.now() - last_date_changed).total_seconds() > 60 * 5:
-                    failures_current_5_minutes = 1
-                else:
-                    failures_current_5_minutes += 1
-                last_date_changed = datetime.datetime.now()
-
-                if failures_current_5_minutes > NUMBER_FAILURES:
-                    end_of_timeout = datetime.datetime.now() + datetime.timedelta(minutes=5)
+                # While the gateway is considered down only the cached tuitions are used
+                value = degree_tuitions.get(serializer.validated_data.get('degree_id'), fetch=not end_of_timeout)
+            except DegreeUnavailable:
+                value = None
+                if not end_of_timeout:
+                    global last_date_changed
+                    global failures_current_5_minutes
+                    if (datetime.datetime.now() - last_date_changed).total_seconds() > 60 * 5:
+                        failures_current_5_minutes = 1
+                    else:
+                        failures_current_5_minutes += 1
+                    last_date_changed = datetime.datetime.now()
+
+                    if failures_current_5_minutes > NUMBER_FAILURES:
+                        end_of_timeout = datetime.datetime.now() + datetime.timedelta(minutes=5)
+
+            if value is not None:
+                now = last_day_of_month(datetime.datetime.now().date())
+                tuition_fees = []
+                range_limit = 1
+
+                if serializer.validated_data.get('payment_type') == "MONTHLY":
+                    range_limit = 10
+
+                new_value = value / range_limit
+
+                for i in range(range_limit):
+                    new_deadline = now + relativedelta(months=+i)
+                    new_deadline = last_day_of_month(new_deadline)
+                    tuition_object = TuitionFee.objects.create(degree_id=serializer.validated_data.get('degree_id'),
+                                                               student_id=serializer.validated_data.get(
+                        'student_id'), amount=new_value,
+                        deadline=new_deadline)
+                    tuition_fees.append(tuition_object)
+
+                tuition_fee_serializer = TuitionFeeSerializer(
+                    tuition_fees, many=True)
+                return Response(tuition_fee_serializer.data, status=status.HTTP_201_CREATED)
 
             return Response({'details': 'Tuition value of the degree is not available'},
                             status=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -268,21 +260,12 @@ class TuitionFeeReceiptCreateView(APIView):
                         'details': 'TuitionFee not yet paid.',
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-                buffer = io.BytesIO()
-
-                pdf = canvas.Canvas(buffer)
-
-                pdf.setTitle("Receipt")
-                pdf.drawString(
-                    200, 500, f"This is the excellent receipt of Tuition nº {tuition_fee.id}")
-                pdf.drawString(
-                    200, 480, f"Student id: {tuition_fee.student_id}")
-                pdf.drawString(200, 460, f"Amount: {tuition_fee.amount}")
-                pdf.drawString(200, 440, f"Deadline: {tuition_fee.deadline}")
-                pdf.showPage()
-                pdf.save()
-
-                buffer.seek(0)
+                buffer = io.BytesIO(RECEIPT_TEMPLATE.stamp([
+                    (200, 500, f"This is the excellent receipt of Tuition nº {tuition_fee.id}"),
+                    (200, 480, f"Student id: {tuition_fee.student_id}"),
+                    (200, 460, f"Amount: {tuition_fee.amount}"),
+                    (200, 440, f"Deadline: {tuition_fee.deadline}"),
+                ]))
                 return FileResponse(buffer, as_attachment=True, filename="certificate.pdf")
             except TuitionFee.DoesNotExist:
                 raise Http404